@@ -0,0 +1,212 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_analyze.py
+Description: Burstiness and Hurst parameter of a part b trace, to choose traces
+             before simulating them. The trace is streamed chunk by chunk:
+             packets are counted in bins of --bin us, and bins are summed in
+             pairs into a pyramid of time scales bin * 2^k, each scale keeping
+             only running sums and a Log_histogram of the packets per bin.
+             - variance-time plot and aggregated variance Hurst estimate
+             - R/S Hurst estimate over blocks of up to 2^rs_levels bins
+             - index of dispersion for counts (variance / mean) per scale
+             - rate quantiles per scale
+             Results go to <trace>.analysis.json, and a later run with the same
+             trace (size and modification time) and options only reads it.
+Dependencies: lab_1_trace, lab_1_stats, numpy, argparse, json, os, time
+"""
+
+import lab_1_trace as trace
+import lab_1_stats as stats
+import numpy as np
+import argparse
+import json
+import os
+import time
+
+VERSION = 1
+RATE_QUANTILES = [0.01, 0.5, 0.99]
+
+class Scale:
+    """ Packets per bin at one time scale, the bins arrive in order. """
+    def __init__(self, width):
+        self.width   = width
+        self.bins    = 0
+        self.total   = 0.0
+        self.squares = 0.0
+        self.counts  = stats.Log_histogram()
+        self.pending = None
+
+    def add(self, counts):
+        """ Add complete bins, returns the bins of the next scale (pairs of these). """
+        self.bins    += len(counts)
+        self.total   += float(counts.sum())
+        self.squares += float(np.dot(counts, counts))
+        self.counts.add_array(counts)
+        if self.pending is not None:
+            counts = np.concatenate(([self.pending], counts))
+            self.pending = None
+        if len(counts) % 2:
+            self.pending = counts[-1]
+            counts = counts[:-1]
+        return counts[0::2] + counts[1::2]
+
+    def mean(self):
+        return self.total / self.bins if self.bins else np.nan
+
+    def variance(self):
+        if self.bins < 2:
+            return np.nan
+        return (self.squares - self.total ** 2 / self.bins) / (self.bins - 1)
+
+class Rescaled_range:
+    """ Mean R/S of the finest bins over blocks of 2^j bins, j = 1 .. levels. """
+    def __init__(self, levels):
+        self.sizes  = [2 ** j for j in range(1, levels + 1)]
+        self.buffer = np.zeros(0)
+        self.total  = np.zeros(len(self.sizes))
+        self.blocks = np.zeros(len(self.sizes), dtype=np.int64)
+
+    def add(self, counts):
+        self.buffer = np.concatenate((self.buffer, counts))
+        span = self.sizes[-1]
+        while len(self.buffer) >= span:
+            self.process(self.buffer[:span])
+            self.buffer = self.buffer[span:]
+
+    def process(self, series):
+        for i, n in enumerate(self.sizes):
+            blocks = series.reshape(-1, n)
+            deviation = np.cumsum(blocks - blocks.mean(axis=1, keepdims=True), axis=1)
+            R = deviation.max(axis=1) - deviation.min(axis=1)
+            S = blocks.std(axis=1)
+            valid = S > 0
+            self.total[i]  += (R[valid] / S[valid]).sum()
+            self.blocks[i] += int(valid.sum())
+
+    def means(self):
+        return np.where(self.blocks > 0, self.total / np.maximum(self.blocks, 1), np.nan)
+
+def slope(x, y):
+    valid = np.isfinite(x) & np.isfinite(y) & (y > 0)
+    if valid.sum() < 2:
+        return np.nan
+    return np.polyfit(np.log(x[valid]), np.log(y[valid]), 1)[0]
+
+def analyze(blocks, bin_width = 1.0, levels = 20, rs_levels = 14, min_bins = 100):
+    """
+    blocks are (inter_arrival, size) arrays as from lab_1_trace. Hurst
+    estimates are fitted over the scales from 8 bins up with at least
+    min_bins bins (aggregated variance) or blocks (R/S).
+    """
+    scales = [Scale(bin_width * 2 ** k) for k in range(levels)]
+    rs = Rescaled_range(rs_levels)
+    clock = 0.0
+    first_bin = 0
+    partial = 0
+    packets = 0
+    for inter_arrival, size in blocks:
+        if len(inter_arrival) == 0:
+            continue
+        arrival = clock + np.cumsum(inter_arrival)
+        clock = arrival[-1]
+        packets += len(arrival)
+        index = (arrival // bin_width).astype(np.int64) - first_bin
+        counts = np.bincount(index).astype(np.float64)
+        counts[0] += partial
+        # The last bin may get more packets from the next chunk
+        partial = counts[-1]
+        first_bin += len(counts) - 1
+        counts = counts[:-1]
+        rs.add(counts)
+        for scale in scales:
+            if len(counts) == 0:
+                break
+            counts = scale.add(counts)
+
+    duration = clock
+    variance = np.array([scale.variance() for scale in scales])
+    widths   = np.array([scale.width for scale in scales])
+    usable   = (np.arange(levels) >= 3) & (np.array([scale.bins for scale in scales]) >= min_bins)
+    H_variance = slope(widths[usable], variance[usable]) / 2
+
+    RS = rs.means()
+    rs_usable = (np.arange(1, rs_levels + 1) >= 3) & (rs.blocks >= min_bins)
+    H_rs = slope(np.array(rs.sizes, dtype=np.float64)[rs_usable], RS[rs_usable])
+
+    rows = []
+    for scale in scales:
+        if scale.bins == 0:
+            break
+        mean = scale.mean()
+        rows.append({"scale": scale.width, "bins": scale.bins, "mean": mean, "variance": scale.variance(),
+                     "idc": scale.variance() / mean if mean else np.nan,
+                     "rate": [scale.counts.quantile(q) / scale.width for q in RATE_QUANTILES]})
+    return {"version": VERSION, "packets": packets, "duration": duration,
+            "rate": packets / duration if duration else np.nan,
+            "H_variance": H_variance, "H_rs": H_rs, "scales": rows,
+            "rs": [{"bins": n, "blocks": int(blocks), "RS": value} for n, blocks, value in zip(rs.sizes, rs.blocks, RS)]}
+
+def cache_key(file_name, bin_width, levels, rs_levels):
+    info = os.stat(file_name)
+    return {"version": VERSION, "file_size": info.st_size, "mtime": info.st_mtime,
+            "bin": bin_width, "levels": levels, "rs_levels": rs_levels}
+
+def analyze_trace(file_name, binary = False, bin_width = 1.0, levels = 20, rs_levels = 14,
+                  chunk_size = 1000000, refresh = False):
+    """ analyze() of a trace file, cached in <file_name>.analysis.json. """
+    cache_file = f"{file_name}.analysis.json"
+    key = cache_key(file_name, bin_width, levels, rs_levels)
+    if not refresh and os.path.exists(cache_file):
+        with open(cache_file, 'r') as file:
+            cached = json.load(file)
+        if cached.get("key") == key:
+            return cached["result"]
+
+    if binary:
+        blocks = trace.read_binary(file_name, chunk_size=chunk_size)
+    else:
+        blocks = trace.read_text(file_name, chunk_size=chunk_size)
+    result = analyze(blocks, bin_width, levels, rs_levels)
+    with open(f"{cache_file}.tmp", 'w') as file:
+        json.dump({"key": key, "result": result}, file)
+    os.replace(f"{cache_file}.tmp", cache_file)
+    return result
+
+def report(file_name, result):
+    lines = [
+        f"Traffic analysis of {file_name}:",
+        f"-------------------------------------------",
+        f"packets: {result['packets']}, duration: {result['duration']:.3f} us, mean rate: {result['rate']:.5f} packets/us",
+        f"Hurst parameter: aggregated variance H = {result['H_variance']:.3f}, R/S H = {result['H_rs']:.3f}",
+        f"{'scale (us)':<14}{'bins':<12}{'mean':<12}{'variance':<14}{'IDC':<10}"
+        + "".join(f"{'rate p' + format(q * 100, 'g'):<14}" for q in RATE_QUANTILES),
+    ]
+    for row in result["scales"]:
+        lines.append(f"{row['scale']:<14g}{row['bins']:<12}{row['mean']:<12.4f}{row['variance']:<14.4f}{row['idc']:<10.3f}"
+                     + "".join(f"{rate:<14.5f}" for rate in row["rate"]))
+    print("\n".join(lines))
+
+if __name__ == "__main__":
+    # Create the parser
+    parser = argparse.ArgumentParser(description="Hurst parameter and burstiness of a part b trace")
+
+    # Add arguments
+    parser.add_argument("--traceNumber", type=str  , default='trace1', help="traceNumber")
+    parser.add_argument("--binary"     , action="store_true", help="Read the binary trace made by lab_1_trace.py")
+    parser.add_argument("--bin"        , type=float, default=1.0    , help="Finest time scale, us")
+    parser.add_argument("--levels"     , type=int  , default=20     , help="Time scales, bin * 2^0 .. bin * 2^(levels - 1)")
+    parser.add_argument("--rs_levels"  , type=int  , default=14     , help="R/S over blocks of 2^1 .. 2^rs_levels bins")
+    parser.add_argument("--chunk"      , type=int  , default=1000000, help="Packets read per block")
+    parser.add_argument("--refresh"    , action="store_true", help="Ignore the cached result")
+
+    # Parse the arguments
+    args = parser.parse_args()
+
+    file_name = trace.binary_name(args.traceNumber) if args.binary else trace.text_name(args.traceNumber)
+    start_time = time.time()
+    result = analyze_trace(file_name, args.binary, args.bin, args.levels, args.rs_levels, args.chunk, args.refresh)
+    report(file_name, result)
+    elapsed_time = time.time() - start_time
+    print(f"End Running. Time Usage: {elapsed_time} s")
@@ -0,0 +1,397 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_bench.py
+Description: Benchmarks for the lab 1 simulator.
+             queue - event engine throughput with the deque FIFO against the
+                     old list.pop(0) FIFO, at high load and with long backlogs.
+             service - cost per Server.service call (one tick of the tick
+                     engine) of the transition table against the old
+                     closures and string states, and the whole tick engine.
+             suite - standard scenarios of part a (Poisson at rho = 0.5, 0.9,
+                     0.99, finite buffers) and part b (every trace found, at
+                     several lengths), each in a fresh process and through
+                     part a simulate() / part b main(), so it times the code
+                     users run. Records the time of every phase (generation,
+                     simulation, summary, packet dump; the event and analytic
+                     engines generate and write packets during simulation),
+                     packets/s and peak RSS, appends the run to a JSON
+                     history and flags regressions against a saved baseline.
+Dependencies: lab_1_functions, lab_1_engine, lab_1_trace, lab_1_profile, lab_1_part_a, lab_1_part_b, numpy, concurrent.futures, 
+              contextlib, argparse, datetime, glob, io, json, os, platform, subprocess, 
+              tempfile, time, resource (not on Windows, psutil is used there if installed)
+"""
+
+import lab_1_functions as f
+import lab_1_engine as e
+import lab_1_trace as trace
+import lab_1_profile as profile
+import lab_1_part_a as a
+import lab_1_part_b as b
+import numpy as np
+import concurrent.futures
+import contextlib
+import argparse
+import datetime
+import glob
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+try:
+    import resource
+except ImportError:
+    resource = None
+
+PHASES = ["generation", "simulation", "summary", "packets"]
+# Phases shorter than this in the baseline are too noisy to compare
+MIN_PHASE_TIME = 0.05
+
+class List_queue(f.Queue):
+    """ The FIFO before the deque change, list.pop(0) is O(n). """
+    def __init__(self, size = 0):
+        super().__init__(size)
+        self.queue = []
+
+    def extract(self):
+        if len(self.queue) != 0:
+            return self.queue.pop(0)
+
+def burst_packets(npkts, seed):
+    """ All packets arrive within the first 1 us, the backlog grows to npkts. """
+    packets = f.Source_part_a(1, npkts, seed=seed).generate()
+    packets.arrival[:] = np.linspace(0, 1, npkts).round(2)
+    return packets
+
+def run_queue(queue_class, packets):
+    fifo   = queue_class()
+    server = f.Server(len(packets))
+    start_time = time.perf_counter()
+    e.run_event(packets, fifo, server)
+    return time.perf_counter() - start_time
+
+def bench_queue(npkts, seed):
+    scenarios = [
+        ("rho = 0.95", lambda: f.Source_part_a(0.95, npkts, seed=seed).generate()),
+        ("rho = 0.99", lambda: f.Source_part_a(0.99, npkts, seed=seed).generate()),
+        ("burst",      lambda: burst_packets(npkts, seed)),
+    ]
+    results = []
+    for name, make_packets in scenarios:
+        row = [name]
+        for queue_class in (List_queue, f.Queue):
+            packets = make_packets()
+            elapsed_time = run_queue(queue_class, packets)
+            row.append(len(packets) / elapsed_time)
+        results.append(row)
+
+    print(f"\n\nQueue benchmark, event engine, {npkts} packets (packets/s):")
+    print("-------------------------------------------")
+    print(f"{'scenario':<16}{'list.pop(0)':>16}{'deque':>16}{'speedup':>10}")
+    for name, list_rate, deque_rate in results:
+        print(f"{name:<16}{list_rate:>16.0f}{deque_rate:>16.0f}{deque_rate / list_rate:>10.2f}")
+    return results
+
+class Closure_server(f.Server):
+    """ Server.service before the transition table: closures rebuilt on every call, string states. """
+    def __init__(self, packet_len, service_rate = 1250):
+        super().__init__(packet_len, service_rate)
+        self.state_current = "INITIAL"
+        self.state_next    = "INITIAL"
+        self.state_flag    = None
+
+    def service(self, queue, service_flag, packet_flag):
+        def state_update(self):
+            self.state_current = self.state_next
+
+        def state_transfer(self):
+            match self.state_current:
+                case "INITIAL":
+                    self.state_next = "GET_PACKET"
+                case "GET_PACKET":
+                    if self.state_flag == "packet_getted":
+                        self.service_flag = "SERVING"
+                        self.state_next = "SERVE"
+                    else:
+                        self.state_next = "GET_PACKET"
+                case "SERVE":
+                    if self.state_flag == "packet_served":
+                        self.service_flag = "IDLE"
+                        self.state_next = "GET_PACKET"
+                        if packet_flag == "to_END":
+                            self.service_end = 1
+                    else:
+                        self.state_next = "SERVE"
+                case _:
+                    self.state_next = "INITIAL"
+
+        def state_initial(self):
+            self.packet = None
+            self.state_flag = None
+            self.time_flag = 1
+            self.time_temp = 0
+
+        def state_get_packet(self, queue):
+            packet_temp = queue.extract()
+            if packet_temp != None:
+                self.packet = packet_temp
+                self.state_flag = "packet_getted"
+
+        def state_serve(self):
+            self.current_time = f.sys_clk
+            if self.time_flag:
+                self.time_temp = self.current_time
+                self.service_time = round(self.packet.size / self.service_rate, 3)
+                self.time_flag = 0
+            time_delta = self.current_time - self.time_temp
+            if time_delta >= self.service_time:
+                self.packet.departure = f"{self.current_time:.3f}"
+                self.packet.spent = self.current_time - self.packet.arrival
+                self.packet_served += 1
+                self.stats.departure(self.packet.spent, self.current_time, self.time_temp - self.packet.arrival)
+                if self.event_log != None:
+                    self.event_log.departure(f.sys_clk, self.packet.index, self.packet.size, self.packet.spent)
+                state_initial(self)
+                self.state_flag = "packet_served"
+
+        match self.state_current:
+            case "INITIAL":
+                state_initial(self)
+            case "GET_PACKET":
+                state_get_packet(self, queue)
+            case "SERVE":
+                state_serve(self)
+            case _:
+                state_initial(self)
+        state_transfer(self)
+        state_update(self)
+        return self.service_flag
+
+def time_calls(server, fifo, calls):
+    """ ns per Server.service call. """
+    service = server.service
+    start_time = time.perf_counter()
+    for i in range(calls):
+        service(fifo, "IDLE", None)
+    return (time.perf_counter() - start_time) / calls * 1e9
+
+def service_calls(server_class, calls):
+    """ ns per call while idle (empty queue) and while serving (the packet never finishes). """
+    f.System_clk(0)
+    fifo   = f.Queue()
+    server = server_class(0)
+    idle = time_calls(server, fifo, calls)
+    packets = f.Source_part_a(1, 1, seed=1).generate()
+    packets.size[:] = 10 ** 9
+    fifo.insert(packets[0], "IDLE")
+    server.service(fifo, "IDLE", None)
+    serving = time_calls(server, fifo, calls)
+    return idle, serving
+
+def bench_service(calls, npkts, seed):
+    rows = []
+    for name, index in (("idle tick", 0), ("serving tick", 1)):
+        rows.append([name] + [service_calls(server_class, calls)[index] for server_class in (Closure_server, f.Server)])
+    results = []
+    for server_class in (Closure_server, f.Server):
+        packets = f.Source_part_a(0.9, npkts, seed=seed).generate()
+        fifo   = f.Queue()
+        server = server_class(npkts)
+        f.System_clk(0)
+        start_time = time.perf_counter()
+        e.run_tick(packets, fifo, server, 0.01)
+        results.append((time.perf_counter() - start_time, server.stats.T()))
+    if results[0][1] != results[1][1]:
+        raise RuntimeError(f"transition table changed T: {results[0][1]} against {results[1][1]}")
+
+    print(f"\n\nServer.service benchmark, {calls} calls (ns per call):")
+    print("-------------------------------------------")
+    print(f"{'scenario':<16}{'closures':>16}{'table':>16}{'speedup':>10}")
+    for name, old, new in rows:
+        print(f"{name:<16}{old:>16.0f}{new:>16.0f}{old / new:>10.2f}")
+    (old, T), (new, _) = results
+    print(f"tick engine, {npkts} packets at rho = 0.9: {old:.3f} s -> {new:.3f} s ({old / new:.2f}x), T = {T:.3f} us in both")
+    return rows, results
+
+def peak_rss():
+    """ Peak resident set size of this process in MB, None if it can not be read. """
+    if resource != None:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kB on Linux, Bytes on macOS
+        return rss / 2 ** 20 if platform.system() == "Darwin" else rss / 2 ** 10
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memory = psutil.Process().memory_info()
+    return getattr(memory, "peak_wset", memory.rss) / 2 ** 20
+
+def find_traces():
+    """ (trace, binary) of every part b trace in the working directory, binary when both exist. """
+    traces = {}
+    for name, binary in ((trace.text_name, False), (trace.binary_name, True)):
+        prefix, suffix = name("*").split("*")
+        for file_name in glob.glob(name("*")):
+            traces[file_name[len(prefix):-len(suffix)]] = binary
+    return sorted(traces.items())
+
+def scenarios(npkts, seed, traces, lengths):
+    rows = []
+    for rho in (0.5, 0.9, 0.99):
+        for engine in ("event", "analytic"):
+            rows.append({"name": f"poisson rho={rho} {engine}", "part": "a", "lambda": rho, "npkts": npkts,
+                         "queue": 0, "engine": engine, "seed": seed})
+    for queue in (10, 100):
+        rows.append({"name": f"poisson rho=0.99 queue={queue}", "part": "a", "lambda": 0.99, "npkts": npkts,
+                     "queue": queue, "engine": "event", "seed": seed})
+    for trace_name, binary in traces:
+        for length in lengths:
+            for engine in ("event", "analytic"):
+                rows.append({"name": f"{trace_name} {length} {engine}", "part": "b", "trace": trace_name,
+                             "binary": binary, "npkts": length, "queue": 0, "engine": engine})
+    return rows
+
+def run_scenario(scenario):
+    """
+    One scenario through the code users run, simulate() of part a and main()
+    of part b, in a temporary directory. The event and analytic engines read
+    and write the packets chunk by chunk during the simulation phase. The
+    phases are timed by a lab_1_profile.Profiler with no modes.
+    """
+    e.show_progress = False
+    profile.enable([])
+    with tempfile.TemporaryDirectory() as file_addr, contextlib.redirect_stdout(io.StringIO()):
+        if scenario["part"] == "a":
+            result = a.simulate(scenario["lambda"], scenario["npkts"], scenario["queue"], scenario["engine"],
+                                scenario["seed"], file_addr, log_mode="off")
+        else:
+            b.main(scenario["trace"], scenario["npkts"], scenario["engine"], binary=scenario["binary"],
+                   log_mode="off", output_root=file_addr, rerun=True)
+            result = load_json(glob.glob(os.path.join(file_addr, "*", "sum.json"))[0], {})
+        recorded = profile.report(file_addr, scenario["name"])["phases"]
+    phases = {phase: recorded.get(phase, 0) for phase in PHASES}
+    npkts = result["served"] + result["dropped"]
+    return {"packets": npkts, "phases": phases, "total": sum(recorded.values()),
+            "rate": npkts / phases["simulation"], "peak_rss": peak_rss()}
+
+def best(runs):
+    """ The fastest time of every phase over the repeats, the largest peak RSS. """
+    phases = {phase: min(run["phases"][phase] for run in runs) for phase in PHASES}
+    rss = [run["peak_rss"] for run in runs if run["peak_rss"] != None]
+    return {"packets": runs[0]["packets"], "phases": phases, "total": sum(phases.values()),
+            "rate": runs[0]["packets"] / phases["simulation"], "peak_rss": max(rss) if rss else None}
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def regressions(result, baseline, tolerance):
+    """ What got worse than the baseline by more than tolerance (relative), as text. """
+    found = []
+    for phase in PHASES:
+        old, new = baseline["phases"][phase], result["phases"][phase]
+        if old >= MIN_PHASE_TIME and new > old * (1 + tolerance):
+            found.append(f"{phase} {new / old - 1:+.0%}")
+    if baseline["peak_rss"] and result["peak_rss"] and result["peak_rss"] > baseline["peak_rss"] * (1 + tolerance):
+        found.append(f"RSS {result['peak_rss'] / baseline['peak_rss'] - 1:+.0%}")
+    return found
+
+def load_json(file_name, default):
+    if not os.path.exists(file_name):
+        return default
+    with open(file_name, 'r') as file:
+        return json.load(file)
+
+def save_json(file_name, data):
+    with open(f"{file_name}.tmp", 'w') as file:
+        json.dump(data, file, indent=1)
+    os.replace(f"{file_name}.tmp", file_name)
+
+def bench_suite(npkts, seed, lengths, repeat = 1, only = None, history_file = "bench_history.json",
+                baseline_file = "bench_baseline.json", save_baseline = False, tolerance = 0.1):
+    """
+    Returns the results by scenario name and the regressions against the
+    baseline. only keeps the scenarios whose name contains one of its words.
+    """
+    rows = scenarios(npkts, seed, find_traces(), lengths)
+    if only:
+        rows = [row for row in rows if any(word in row["name"] for word in only)]
+    baseline = load_json(baseline_file, {}).get("results", {})
+
+    results = {}
+    found = {}
+    print(f"\n\nBenchmark suite, best of {repeat} (times in s):")
+    print("-------------------------------------------")
+    print(f"{'scenario':<36}{'packets':>10}" + "".join(f"{phase:>12}" for phase in PHASES)
+          + f"{'packets/s':>12}{'peak MB':>10}  vs baseline")
+    for row in rows:
+        runs = []
+        for i in range(repeat):
+            # A fresh process per run, so the peak RSS is that of the scenario alone
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1) as pool:
+                runs.append(pool.submit(run_scenario, row).result())
+        result = best(runs)
+        results[row["name"]] = dict(result, scenario=row)
+        note = "-"
+        if row["name"] in baseline:
+            found[row["name"]] = regressions(result, baseline[row["name"]], tolerance)
+            note = "REGRESSION " + ", ".join(found[row["name"]]) if found[row["name"]] else "ok"
+        rss = f"{result['peak_rss']:.0f}" if result["peak_rss"] != None else "-"
+        print(f"{row['name']:<36}{result['packets']:>10}" + "".join(f"{result['phases'][phase]:>12.3f}" for phase in PHASES)
+              + f"{result['rate']:>12.0f}{rss:>10}  {note}")
+
+    run = {"date": datetime.datetime.now().isoformat(timespec="seconds"), "commit": git_commit(),
+           "python": platform.python_version(), "machine": platform.node(), "repeat": repeat, "results": results}
+    history = load_json(history_file, [])
+    history.append(run)
+    save_json(history_file, history)
+    if save_baseline:
+        save_json(baseline_file, run)
+        print(f"Baseline saved to {baseline_file}")
+    return results, {name: items for name, items in found.items() if items}
+
+if __name__ == "__main__":
+    # Create the parser
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="bench", required=True)
+
+    # Add arguments
+    parser_queue = subparsers.add_parser("queue", help="FIFO throughput with long backlogs")
+    parser_queue.add_argument("--npkts", type=int, default=200000, help="npkts")
+    parser_queue.add_argument("--seed" , type=int, default=1     , help="Random seed")
+    parser_service = subparsers.add_parser("service", help="Server.service transition table against the old closures")
+    parser_service.add_argument("--calls", type=int, default=1000000, help="Server.service calls per scenario")
+    parser_service.add_argument("--npkts", type=int, default=20000  , help="Packets of the tick engine run")
+    parser_service.add_argument("--seed" , type=int, default=1      , help="Random seed")
+    parser_suite = subparsers.add_parser("suite", help="Standard part a / part b scenarios with history and baseline")
+    parser_suite.add_argument("--npkts"    , type=int  , default=200000, help="Packets of every part a scenario")
+    parser_suite.add_argument("--seed"     , type=int  , default=1     , help="Random seed")
+    parser_suite.add_argument("--lengths"  , type=int  , nargs="+", default=[10000, 100000, 1000000], help="Packets read from every trace")
+    parser_suite.add_argument("--repeat"   , type=int  , default=1     , help="Runs per scenario, the best is kept")
+    parser_suite.add_argument("--only"     , type=str  , nargs="+", default=None, help="Only scenarios whose name contains one of these")
+    parser_suite.add_argument("--history"  , type=str  , default="bench_history.json" , help="Every run is appended here")
+    parser_suite.add_argument("--baseline" , type=str  , default="bench_baseline.json", help="Results to compare against")
+    parser_suite.add_argument("--save_baseline", action="store_true", help="Make this run the baseline")
+    parser_suite.add_argument("--tolerance", type=float, default=0.1   , help="Slowdown or RSS growth flagged as a regression")
+
+    # Parse the arguments
+    args = parser.parse_args()
+
+    match args.bench:
+        case "queue":
+            bench_queue(args.npkts, args.seed)
+        case "service":
+            bench_service(args.calls, args.npkts, args.seed)
+        case "suite":
+            results, found = bench_suite(args.npkts, args.seed, args.lengths, args.repeat, args.only, args.history,
+                                         args.baseline, args.save_baseline, args.tolerance)
+            if found:
+                print(f"{len(found)} scenarios regressed by more than {args.tolerance:.0%}")
+                raise SystemExit(1)
@@ -0,0 +1,122 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_checkpoint.py
+Description: Snapshots of a chunked lab 1 run (lab_1_engine.run_event_chunks or
+             run_analytic_chunks) to <log directory>/checkpoint.pkl, taken
+             between chunks every few chunks, and the resume from the last one.
+             A snapshot holds the clock, the source position (RNG state or
+             trace offset), Queue, Server and Steady_state (statistics, packets
+             in the queue and in service), the engine state (events, backlog,
+             chunks not written yet) and the sizes of the packet file, sim.trace and
+             sum.log, which are cut back to those sizes on resume. A resumed run
+             gives the same files as a run that was never stopped.
+             The text sim.log can not be resumed (it rotates), use the binary
+             or off per-event log.
+Dependencies: lab_1_functions, pickle, os
+"""
+
+import lab_1_functions as f
+import pickle
+import os
+
+VERSION = 1
+
+def file_name(file_addr):
+    return f"{file_addr}/checkpoint.pkl"
+
+def exists(file_addr):
+    return os.path.exists(file_name(file_addr))
+
+def object_state(obj):
+    """ The attributes of obj, without the per-event log (an open file and thread). """
+    return {key: value for key, value in obj.__dict__.items() if key != "event_log"}
+
+def file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+def load(file_addr, params):
+    """
+    The last snapshot in file_addr, None if there is none. The files written
+    after it are cut back, so they can be opened for append.
+    """
+    if not exists(file_addr):
+        return None
+    with open(file_name(file_addr), 'rb') as file:
+        state = pickle.load(file)
+    if state["version"] != VERSION:
+        raise ValueError(f"{file_name(file_addr)}: unsupported checkpoint version {state['version']}")
+    if state["params"] != params:
+        raise ValueError(f"{file_name(file_addr)} was made with {state['params']}, not {params}")
+    for name, size in state["files"].items():
+        path = f"{file_addr}/{name}"
+        if file_size(path) < size:
+            raise ValueError(f"{path} is shorter than at the checkpoint, can not resume")
+        if os.path.exists(path):
+            os.truncate(path, size)
+    return state
+
+class Checkpoint:
+    """
+    every: chunks between snapshots, 0 only resumes. params are the run
+    parameters, a resume with other parameters is refused.
+    """
+    def __init__(self, file_addr, every, params, source, fifo, server, monitor = None, log = None, pkt_file = None):
+        self.file_addr = file_addr
+        self.every     = every
+        self.params    = params
+        self.source    = source
+        self.fifo      = fifo
+        self.server    = server
+        self.monitor   = monitor
+        self.log       = log
+        self.pkt_file  = pkt_file
+        self.chunks    = 0
+
+    def due(self):
+        """ Called once per chunk by the engine. """
+        self.chunks += 1
+        return self.every and self.chunks % self.every == 0
+
+    def save(self, engine_state):
+        files = {"sum.log": file_size(f"{self.file_addr}/sum.log")}
+        if self.pkt_file != None:
+            self.pkt_file.flush()
+            files[os.path.basename(self.pkt_file.name)] = self.pkt_file.tell()
+        if self.log != None and self.log.log_file != None:
+            self.log.flush()
+            files[os.path.basename(self.log.log_file)] = file_size(self.log.log_file)
+        state = {
+            "version": VERSION,
+            "params":  self.params,
+            "sys_clk": f.sys_clk,
+            "source":  self.source.state(),
+            "fifo":    object_state(self.fifo),
+            "server":  object_state(self.server),
+            "monitor": object_state(self.monitor) if self.monitor != None else None,
+            "engine":  engine_state,
+            "files":   files,
+        }
+        # Written next to the old snapshot and renamed, a crash never leaves half a snapshot
+        temp_file = f"{file_name(self.file_addr)}.tmp"
+        with open(temp_file, 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_file, file_name(self.file_addr))
+
+    def restore(self, state):
+        """ Put a loaded snapshot back into the run's objects, returns the engine state. """
+        f.System_clk(state["sys_clk"])
+        self.source.restore(state["source"])
+        self.fifo.__dict__.update(state["fifo"])
+        self.server.__dict__.update(state["server"])
+        if self.monitor != None:
+            self.monitor.__dict__.update(state["monitor"])
+        return state["engine"]
+
+    def finish(self):
+        """ The run is complete, there is nothing to resume. """
+        if exists(self.file_addr):
+            os.remove(file_name(self.file_addr))
@@ -0,0 +1,146 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_discipline.py
+Description: Scheduling disciplines for the lab 1 Queue over packet classes
+             (packet.cls, 0 .. classes - 1).
+             fifo     - one deque, the default, class blind.
+             priority - strict priority, class 0 first, FIFO within a class.
+             drr      - deficit round robin, quantum Bytes per class per round.
+             wfq      - weighted fair queueing with self-clocked virtual time
+                        (SCFQ), the packet with the smallest finish tag first.
+             Every discipline has the deque methods Queue uses: append,
+             popleft and len, so Queue.insert / extract and Server.service
+             work with any of them. priority and drr are O(classes) per
+             packet, drr skips rounds in which no class can send in one
+             step, so a quantum smaller than the packets costs nothing
+             extra. wfq is O(log n). Quanta and weights must be > 0.
+Dependencies: collections, heapq, math
+"""
+
+import collections
+import heapq
+import math
+
+DISCIPLINES = ["fifo", "priority", "drr", "wfq"]
+
+class Priority:
+    def __init__(self, classes):
+        self.queues = [collections.deque() for i in range(classes)]
+        self.count  = 0
+
+    def append(self, packet):
+        self.queues[packet.cls].append(packet)
+        self.count += 1
+
+    def popleft(self):
+        for queue in self.queues:
+            if queue:
+                self.count -= 1
+                return queue.popleft()
+        raise IndexError("pop from an empty queue")
+
+    def __len__(self):
+        return self.count
+
+def check_positive(values, name):
+    if any(value <= 0 for value in values):
+        raise ValueError(f"every {name} must be > 0, not {list(values)}")
+    return list(values)
+
+class Drr:
+    """ quantum[c] Bytes of credit per round, a class is only in active while it has packets. """
+    def __init__(self, quantum):
+        self.quantum = check_positive(quantum, "DRR quantum")
+        self.queues  = [collections.deque() for i in self.quantum]
+        self.deficit = [0 for i in self.quantum]
+        self.active  = collections.deque()
+        self.visited = False
+        self.count   = 0
+
+    def append(self, packet):
+        queue = self.queues[packet.cls]
+        if not queue:
+            self.active.append(packet.cls)
+        queue.append(packet)
+        self.count += 1
+
+    def popleft(self):
+        misses = 0
+        while self.active:
+            if misses == len(self.active):
+                # A whole round without a packet sent, jump to the round in which the first class can send
+                self.skip_rounds()
+                misses = 0
+            c = self.active[0]
+            queue = self.queues[c]
+            if not self.visited:
+                self.deficit[c] += self.quantum[c]
+                self.visited = True
+            if queue[0].size <= self.deficit[c]:
+                packet = queue.popleft()
+                self.deficit[c] -= packet.size
+                self.count -= 1
+                if not queue:
+                    self.deficit[c] = 0
+                    self.active.popleft()
+                    self.visited = False
+                return packet
+            # Not enough credit, the next class gets its turn
+            self.active.rotate(-1)
+            self.visited = False
+            misses += 1
+        raise IndexError("pop from an empty queue")
+
+    def skip_rounds(self):
+        """ Add the quanta of all but the last of the rounds until some class has enough credit. """
+        rounds = min(math.ceil((self.queues[c][0].size - self.deficit[c]) / self.quantum[c]) for c in self.active)
+        for c in self.active:
+            self.deficit[c] += (rounds - 1) * self.quantum[c]
+
+    def __len__(self):
+        return self.count
+
+class Wfq:
+    """
+    finish = max(virtual time, last finish of the class) + size / weight,
+    the virtual time is the finish tag of the last packet taken into service.
+    """
+    def __init__(self, weights):
+        self.weights = check_positive(weights, "WFQ weight")
+        self.finish  = [0 for i in self.weights]
+        self.virtual_time = 0
+        self.heap = []
+        self.seq  = 0
+
+    def append(self, packet):
+        c = packet.cls
+        self.finish[c] = max(self.virtual_time, self.finish[c]) + packet.size / self.weights[c]
+        heapq.heappush(self.heap, (self.finish[c], self.seq, packet))
+        self.seq += 1
+
+    def popleft(self):
+        finish, _, packet = heapq.heappop(self.heap)
+        self.virtual_time = finish
+        return packet
+
+    def __len__(self):
+        return len(self.heap)
+
+def make(discipline, classes = 1, weights = None):
+    """
+    Queue discipline for Queue(size, discipline). weights are the DRR quantum
+    in Bytes or the WFQ weights, one per class, default equal.
+    """
+    match discipline:
+        case "fifo":
+            return collections.deque()
+        case "priority":
+            return Priority(classes)
+        case "drr":
+            return Drr(weights or [1250] * classes)
+        case "wfq":
+            return Wfq(weights or [1] * classes)
+        case _:
+            raise ValueError(f"Unknown discipline: {discipline}")
@@ -0,0 +1,273 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_engine.py
+Description: Simulation engines that drive Source, Queue and Server for lab 1.
+             tick  - fixed clock step, calls Server.service on every tick.
+             event - next-event time advance, jumps from event to event.
+             analytic - Lindley recursion over arrays, FIFO with infinite buffer only.
+             The event and analytic engines also run over chunks of packets,
+             with a lab_1_checkpoint.Checkpoint snapshot between chunks.
+Dependencies: lab_1_functions, numpy, contextlib, heapq, tqdm
+"""
+
+import lab_1_functions as f
+import numpy as np
+import contextlib
+import heapq
+from tqdm import tqdm
+
+ENGINES = ["event", "tick", "analytic"]
+
+# Progress bars, turned off by the batch runners
+show_progress = True
+
+# Departures are popped before arrivals at the same time, the same order as
+# the tick loop (Server.service runs before Queue.insert in every tick).
+DEPARTURE = 0
+ARRIVAL   = 1
+
+class Event_scheduler:
+    """ Priority queue of (time, kind, seq, data) events. """
+    def __init__(self):
+        self.events = []
+        self.seq    = 0
+
+    def push(self, time, kind, data=None):
+        heapq.heappush(self.events, (time, kind, self.seq, data))
+        self.seq += 1
+
+    def pop(self):
+        return heapq.heappop(self.events)
+
+    def __len__(self):
+        return len(self.events)
+
+def run_tick(packets, fifo, server, clk_step):
+    npkts = len(packets)
+    packet_index = 0
+    service_flag = "IDLE"
+    packet_flag  = None
+
+    # Time setting
+    clk = 0
+
+    # Progress bar
+    packet_insert_progress = tqdm(range(npkts), desc="Packets insert progress", position=0, leave=True, disable=not show_progress)
+    packet_served_progress = tqdm(range(npkts), desc="Packets served progress", position=1, leave=True, disable=not show_progress)
+    while 1:
+        f.System_clk(clk)
+
+        # Start service
+        service_flag = server.service(fifo, service_flag, packet_flag)
+        if server.state_flag == f.PACKET_SERVED:
+            packet_served_progress.update(1)
+
+        # FIFO Queue
+        if packet_index < npkts:
+            packet_current = packets[packet_index]
+            if clk >= packet_current.arrival:
+                num_in_sys = fifo.insert(packet_current, service_flag)
+                if num_in_sys != None:
+                    server.arrival(packet_current, num_in_sys)
+                packet_index += 1
+                packet_insert_progress.update(1)
+        else:
+            if len(fifo.queue) == 0:
+                packet_flag = "to_END"
+
+        if server.service_end:
+            break
+
+        clk += clk_step
+
+def lindley(arrival, service, backlog = None):
+    """
+    FIFO single server with infinite buffer, packets in arrival order.
+    departure[i] = max(arrival[i], departure[i-1]) + service[i], unrolled to
+    departure[i] = work[i] + max over j <= i of (arrival[j] - work[j-1]),
+    with work the cumulative service time.
+    backlog holds the departure times of earlier packets still in the system
+    when arrival[0] comes, so a long run can be fed chunk by chunk.
+    Returns departure, waiting time in the queue and the number of packets 
+    found in the system by each arrival.
+    """
+    if backlog is None:
+        backlog = np.zeros(0)
+    start = arrival
+    if len(backlog) and len(arrival):
+        start = arrival.copy()
+        start[0] = max(start[0], backlog[-1])
+    work = np.cumsum(service)
+    # Back on the 0.001 us grid, so a tie does not depend on where the sum started
+    departure = np.round(work + np.maximum.accumulate(start - (work - service)), 3)
+    wait = np.maximum(departure - service - arrival, 0)
+    # A departure at the same time as an arrival leaves first
+    index = np.arange(len(arrival)) + len(backlog)
+    departures = np.concatenate((backlog, departure))
+    departed = np.minimum(np.searchsorted(departures, arrival, side="right"), index)
+    num_in_sys = index - departed
+    return departure, wait, num_in_sys
+
+def run_event_chunks(chunks, fifo, server, pkt_file = None, monitor = None, checkpoint = None, state = None):
+    """
+    Event engine over an iterable of Packet_table chunks, run_event is the
+    whole table as one chunk. A chunk stops after its last arrival, the
+    departures still to come stay in the scheduler for the next one. Chunks
+    are appended to pkt_file (open file or Packet_writer) in order once every
+    packet in them has left (served or dropped). When monitor.done() stops the
+    run, the packets after the last arrival are not written. state is the
+    engine state of a checkpoint to carry on from.
+    """
+    scheduler = Event_scheduler()
+    unsaved = []    # [chunk, packets not left yet], oldest first
+    stopped = False
+    if state != None:
+        scheduler.__dict__.update(state["scheduler"])
+        unsaved = state["unsaved"]
+        stopped = state["stopped"]
+    remaining = {id(entry[0]): entry for entry in unsaved}
+
+    packet_served_progress = tqdm(desc="Packets served progress", position=0, leave=True, disable=not show_progress)
+    chunks = iter(chunks)
+    while True:
+        packets = None if stopped else next(chunks, None)
+        if packets != None:
+            if len(packets) == 0:
+                continue
+            entry = [packets, len(packets)]
+            unsaved.append(entry)
+            remaining[id(packets)] = entry
+            scheduler.push(packets.arrival[0], ARRIVAL, 0)
+
+        # Without a new chunk the system drains
+        while scheduler:
+            clk, kind, _, packet_index = scheduler.pop()
+            f.System_clk(clk)
+
+            if kind == DEPARTURE:
+                packet = server.depart()
+                remaining[id(packet.table)][1] -= 1
+                packet_served_progress.update(1)
+                if monitor != None:
+                    monitor.departure(packet.spent)
+            else:
+                packet = packets[packet_index]
+                num_in_sys = fifo.insert(packet, server.service_flag)
+                if num_in_sys != None:
+                    server.arrival(packet, num_in_sys)
+                else:
+                    remaining[id(packets)][1] -= 1
+                if monitor != None:
+                    if num_in_sys != None:
+                        monitor.arrival(num_in_sys)
+                    stopped = monitor.done()
+                    if stopped:
+                        # The packets after this one never arrive, they are not written
+                        remaining[id(packets)][1] -= len(packets) - packet_index - 1
+                        packets.truncate(packet_index + 1)
+                if not stopped and packet_index + 1 < len(packets):
+                    scheduler.push(packets.arrival[packet_index + 1], ARRIVAL, packet_index + 1)
+
+            if server.service_flag == "IDLE":
+                packet = fifo.extract()
+                if packet != None:
+                    scheduler.push(round(clk + server.start(packet), 3), DEPARTURE)
+
+            if kind == ARRIVAL and (stopped or packet_index + 1 == len(packets)):
+                break
+
+        # At the end every chunk left is written, cut after the last arrival on a stop
+        while unsaved and (unsaved[0][1] == 0 or packets == None):
+            if pkt_file != None:
+                unsaved[0][0].save(pkt_file)
+            del remaining[id(unsaved[0][0])]
+            unsaved.pop(0)
+        if packets == None:
+            break
+        if checkpoint != None and checkpoint.due():
+            checkpoint.save({"scheduler": scheduler.__dict__, "unsaved": unsaved, "stopped": stopped})
+
+    server.service_end = 1
+
+def run_analytic_chunks(chunks, fifo, server, pkt_file = None, monitor = None, checkpoint = None, state = None):
+    """
+    Run the analytic engine over an iterable of Packet_table chunks, keeping 
+    only the departures still in the system between chunks. Each chunk is 
+    appended to pkt_file (path, open file or Packet_writer) once done. No 
+    more chunks are read once monitor.done(). state is the engine state of a
+    checkpoint to carry on from.
+    """
+    if fifo.size != 0:
+        raise ValueError("analytic engine only supports an infinite buffer (--queue 0)")
+    if fifo.discipline != "fifo":
+        raise ValueError("analytic engine only supports the fifo discipline")
+
+    backlog = np.zeros(0)
+    if state != None:
+        backlog = state["backlog"]
+    with contextlib.ExitStack() as stack:
+        if isinstance(pkt_file, str):
+            pkt_file = stack.enter_context(open(pkt_file, 'w'))
+        for packets in chunks:
+            if len(packets) == 0:
+                continue
+            service = np.round(packets.size / server.service_rate, 3)
+            departure, wait, num_in_sys = lindley(packets.arrival, service, backlog)
+            packets.departure[:] = departure
+            packets.spent[:] = departure - packets.arrival
+            packets.num_in_sys[:] = num_in_sys
+
+            server.packet_served += len(packets)
+            server.stats.arrivals(num_in_sys)
+            server.stats.departures(packets.spent, departure[-1], wait)
+            if server.class_stats != None:
+                for c, class_stats in enumerate(server.class_stats):
+                    mask = packets.cls == c
+                    class_stats.arrivals(num_in_sys[mask])
+                    class_stats.departures(packets.spent[mask], departure[-1], wait[mask])
+            f.System_clk(departure[-1])
+            if pkt_file != None:
+                packets.save(pkt_file)
+            if monitor != None:
+                monitor.arrivals(num_in_sys)
+                monitor.departures(packets.spent)
+                if monitor.done():
+                    break
+
+            backlog = np.concatenate((backlog, departure))
+            backlog = backlog[backlog > packets.arrival[-1]]
+            if checkpoint != None and checkpoint.due():
+                checkpoint.save({"backlog": backlog})
+
+    server.service_end = 1
+
+def run_event(packets, fifo, server, monitor = None):
+    """
+    monitor (lab_1_stats.Steady_state) gets every arrival and departure, once
+    monitor.done() no more packets arrive and the system drains.
+    """
+    run_event_chunks(iter([packets]), fifo, server, monitor=monitor)
+
+def run_analytic(packets, fifo, server, monitor = None):
+    run_analytic_chunks([packets], fifo, server, monitor=monitor)
+
+def resolve(engine, fifo_len):
+    """ "auto" picks analytic for an infinite buffer and event otherwise. """
+    if engine == "auto":
+        return "analytic" if fifo_len == 0 else "event"
+    return engine
+
+def run(engine, packets, fifo, server, clk_step, monitor = None):
+    match engine:
+        case "tick":
+            if monitor != None:
+                raise ValueError("tick engine does not support steady-state estimation")
+            run_tick(packets, fifo, server, clk_step)
+        case "event":
+            run_event(packets, fifo, server, monitor)
+        case "analytic":
+            run_analytic(packets, fifo, server, monitor)
+        case _:
+            raise ValueError(f"Unknown engine: {engine}")
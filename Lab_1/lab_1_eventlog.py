@@ -0,0 +1,163 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_eventlog.py
+Description: Per-event log of the lab 1 simulator (every ARRIVAL and DEPARTURE).
+             Text_log   - formats every event into sim.log through logging, as before.
+             Binary_log - appends fixed-size records to a list and hands full
+                          blocks to a writer thread, which writes sim.trace.
+             decode() turns sim.trace back into the same lines as sim.log.
+             Binary layout: one 16 Bytes header (magic, version, record size)
+             followed by packed little endian records.
+Dependencies: numpy, argparse, os, queue, threading
+"""
+
+import numpy as np
+import argparse
+import os
+import queue
+import threading
+
+MAGIC   = b"L1_EVENT"
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("record_size", "<u4")])
+RECORD_DTYPE = np.dtype([("time", "<f8"), ("kind", "u1"), ("index", "<i8"), ("size", "<u4"),
+                         ("num_in_Q", "<i4"), ("num_in_sys", "<i4"), ("spent", "<f8")])
+
+DEPARTURE = 0
+ARRIVAL   = 1
+
+MODES = ["text", "binary", "off"]
+
+def arrival_line(time, index, size, num_in_Q, num_in_sys):
+    return "Time: {} ARRIVAL    Index: {} Packet size:{} Find {} packets in the Queue and {} in the system"\
+        .format(f"{time:<12.3f}", f"{index:<6}", f"{size:<6}", num_in_Q, num_in_sys)
+
+def departure_line(time, index, size, spent):
+    return "Time: {} DEPARTURE  Index: {} Packet size:{} Spent {} us in the system"\
+        .format(f"{time:<12.3f}", f"{index:<6}", f"{size:<6}", f"{spent:.3f}")
+
+class Text_log:
+    def __init__(self, logger):
+        self.logger = logger
+
+    def arrival(self, time, index, size, num_in_Q, num_in_sys):
+        self.logger.info(arrival_line(time, index, size, num_in_Q, num_in_sys))
+
+    def departure(self, time, index, size, spent):
+        self.logger.info(departure_line(time, index, size, spent))
+
+    def flush(self):
+        for handler in self.logger.handlers:
+            handler.flush()
+
+    def close(self):
+        self.flush()
+
+class Binary_log:
+    """
+    The hot path only appends a tuple to a list. Every block_size events the
+    list goes to the writer thread, which packs it into records and writes it.
+    append continues an existing sim.trace (resume from a checkpoint).
+    """
+    def __init__(self, file_name, block_size = 65536, append = False):
+        self.file_name  = file_name
+        self.block_size = block_size
+        self.block      = []
+        if append:
+            self.file = open(file_name, 'ab', buffering=16 * 1024 * 1024)
+        else:
+            self.file = open(file_name, 'wb', buffering=16 * 1024 * 1024)
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header["magic"] = MAGIC
+            header["version"] = VERSION
+            header["record_size"] = RECORD_DTYPE.itemsize
+            header.tofile(self.file)
+        self.blocks = queue.Queue(maxsize=8)
+        self.writer = threading.Thread(target=self.write_blocks, daemon=True)
+        self.writer.start()
+
+    def arrival(self, time, index, size, num_in_Q, num_in_sys):
+        self.block.append((time, ARRIVAL, index, size, num_in_Q, num_in_sys, 0))
+        if len(self.block) >= self.block_size:
+            self.blocks.put(self.block)
+            self.block = []
+
+    def departure(self, time, index, size, spent):
+        self.block.append((time, DEPARTURE, index, size, 0, 0, spent))
+        if len(self.block) >= self.block_size:
+            self.blocks.put(self.block)
+            self.block = []
+
+    def write_blocks(self):
+        while True:
+            block = self.blocks.get()
+            if block is None:
+                self.blocks.task_done()
+                break
+            np.array(block, dtype=RECORD_DTYPE).tofile(self.file)
+            self.blocks.task_done()
+
+    def flush(self):
+        """ Wait until every event so far is in the file. """
+        if self.block:
+            self.blocks.put(self.block)
+            self.block = []
+        self.blocks.join()
+        self.file.flush()
+
+    def close(self):
+        if self.block:
+            self.blocks.put(self.block)
+            self.block = []
+        self.blocks.put(None)
+        self.writer.join()
+        self.file.close()
+
+def read(file_name, chunk_size = 1000000):
+    """ Yield blocks of records from sim.trace. """
+    header = np.fromfile(file_name, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header[0]["magic"] != MAGIC:
+        raise ValueError(f"{file_name} is not a lab 1 event trace")
+    if header[0]["version"] != VERSION or header[0]["record_size"] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{file_name}: unsupported event trace version {header[0]['version']}")
+    count = (os.path.getsize(file_name) - HEADER_DTYPE.itemsize) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return
+    records = np.memmap(file_name, dtype=RECORD_DTYPE, mode='r', offset=HEADER_DTYPE.itemsize, shape=(count,))
+    for i in range(0, count, chunk_size):
+        yield records[i:i + chunk_size]
+
+def decode(trace_file, log_file):
+    """ Write the text log of a binary trace, line for line the same as a text sim.log. """
+    count = 0
+    with open(log_file, 'w') as file:
+        for records in read(trace_file):
+            lines = []
+            for time, kind, index, size, num_in_Q, num_in_sys, spent in records.tolist():
+                if kind == ARRIVAL:
+                    lines.append(arrival_line(time, index, size, num_in_Q, num_in_sys))
+                else:
+                    lines.append(departure_line(time, index, size, spent))
+            file.write("\n".join(lines) + "\n")
+            count += len(lines)
+    return count
+
+if __name__ == "__main__":
+    # Create the parser
+    parser = argparse.ArgumentParser(description="Decode a binary sim.trace into the text sim.log")
+
+    # Add arguments
+    parser.add_argument("trace"   , type=str, help="sim.trace file, or the log directory that holds it")
+    parser.add_argument("--output", type=str, default=None, help="Text log to write, default sim.log next to the trace")
+
+    # Parse the arguments
+    args = parser.parse_args()
+
+    trace_file = args.trace
+    if os.path.isdir(trace_file):
+        trace_file = os.path.join(trace_file, "sim.trace")
+    log_file = args.output or os.path.join(os.path.dirname(trace_file), "sim.log")
+    count = decode(trace_file, log_file)
+    print(f"{trace_file} -> {log_file}: {count} events")
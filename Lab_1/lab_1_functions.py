@@ -1,30 +1,77 @@
 """
 Code Author: Peng, Caikun
 Create Date: 01/06/2024 
-Last Edit Date: 05/06/2024
+Last Edit Date: 18/10/2026
 File Name: lab_1_functions.py
 Description: Functions of M/M/1 queue modle for lab 1.
-Dependencies: numpy, logging
+Dependencies: lab_1_trace, lab_1_lrd, lab_1_eventlog, lab_1_stats, lab_1_discipline, lab_1_packets, numpy, json, 
+              logging
 """
 
+import lab_1_trace as trace
+import lab_1_lrd as lrd
+import lab_1_eventlog as eventlog
+import lab_1_stats as stats
+import lab_1_discipline as disc
+import lab_1_packets as pktio
 import numpy as np
+import json
 import logging
 from logging.handlers import RotatingFileHandler
 
 sys_clk = 0 
+sim_event_log = None
 
 class log_init:
-	def __init__(self, file_addr):
-		self.log_file = f"{file_addr}/sim.log"
-		formatter = logging.Formatter('%(message)s')
-		handler = RotatingFileHandler(self.log_file, 
-									  mode='w', 
-									  maxBytes=100 * 1024 * 1024, # 100MB 
-									  backupCount=100)			  # 10000MB in total
-		handler.setFormatter(formatter)
-		logger = logging.getLogger("sim_log")
-		logger.setLevel(logging.INFO)
-		logger.addHandler(handler)
+	"""
+	Per-event log of the run in file_addr, mode is one of eventlog.MODES:
+	text   - sim.log through a RotatingFileHandler
+	binary - sim.trace, decode with lab_1_eventlog.py
+	off    - no per-event log at all
+	Queue and Server made after this pick it up, call close() at the end of the run.
+	append continues the sim.trace of a run resumed from a checkpoint.
+	"""
+	def __init__(self, file_addr, mode = "text", append = False):
+		global sim_event_log
+		self.mode  = mode
+		self.event_log = None
+		match mode:
+			case "text":
+				if append:
+					raise ValueError("a text sim.log can not be resumed, use the binary or off log")
+				self.log_file = f"{file_addr}/sim.log"
+				formatter = logging.Formatter('%(message)s')
+				handler = RotatingFileHandler(self.log_file, 
+											  mode='w', 
+											  maxBytes=100 * 1024 * 1024, # 100MB 
+											  backupCount=100)			  # 10000MB in total
+				handler.setFormatter(formatter)
+				logger = logging.getLogger("sim_log")
+				logger.setLevel(logging.INFO)
+				# One sim.log per run, drop the handler of a previous run in the same process
+				for old_handler in logger.handlers[:]:
+					logger.removeHandler(old_handler)
+					old_handler.close()
+				logger.addHandler(handler)
+				self.event_log = eventlog.Text_log(logger)
+			case "binary":
+				self.log_file = f"{file_addr}/sim.trace"
+				self.event_log = eventlog.Binary_log(self.log_file, append=append)
+			case "off":
+				self.log_file = None
+			case _:
+				raise ValueError(f"Unknown log mode: {mode}")
+		sim_event_log = self.event_log
+
+	def flush(self):
+		if self.event_log != None:
+			self.event_log.flush()
+
+	def close(self):
+		global sim_event_log
+		if self.event_log != None:
+			self.event_log.close()
+		sim_event_log = None
 
 class System_clk:
 	def __init__(self, clk=0):
@@ -47,71 +94,264 @@ class Packet:
 		return "Index: {} Packet size: {} Arrival time: {} Departure time: {} Spent time: {}"\
 			.format(f"{self.index:<6}", f"{self.size:<6}", f"{self.arrival:<12}", f"{self.departure:<12}", f"{self.spent:<12.3f}")
 
+class Packet_table:
+	"""
+	Columnar packet store, one array per field instead of one Packet object per packet.
+	packets[i] returns a Packet_view for code that works on a single packet.
+	"""
+	def __init__(self, npkts = 0, first_index = 0):
+		self.index     = np.arange(first_index, first_index + npkts, dtype=np.int64)
+		self.arrival   = np.zeros(npkts, dtype=np.float64)
+		self.departure = np.zeros(npkts, dtype=np.float64)
+		self.spent     = np.zeros(npkts, dtype=np.float64)
+		self.size      = np.zeros(npkts, dtype=np.uint32)
+		self.cls       = np.zeros(npkts, dtype=np.uint8)
+		# Packets in the system found on arrival, -1 for a dropped packet
+		self.num_in_sys = np.full(npkts, -1, dtype=np.int32)
+
+	def __len__(self):
+		return len(self.arrival)
+
+	def __getitem__(self, i):
+		return Packet_view(self, i)
+
+	def __iter__(self):
+		for i in range(len(self)):
+			yield Packet_view(self, i)
+
+	@classmethod
+	def concatenate(cls, tables):
+		packets = cls()
+		if tables:
+			for field in ("index", "arrival", "departure", "spent", "size", "cls", "num_in_sys"):
+				setattr(packets, field, np.concatenate([getattr(table, field) for table in tables]))
+		return packets
+
+	def truncate(self, npkts):
+		""" Keep the first npkts packets, the arrays are cut in place (views of the old ones). """
+		for field in ("index", "arrival", "departure", "spent", "size", "cls", "num_in_sys"):
+			setattr(self, field, getattr(self, field)[:npkts])
+
+	def save(self, file_name):
+		"""
+		Same layout as Packet.__str__, written in one call.
+		file_name can also be an open file, to append chunk after chunk, or a
+		lab_1_packets.Packet_writer for the compressed packets.bin.
+		"""
+		if isinstance(file_name, pktio.Packet_writer):
+			file_name.write(self)
+			return
+		columns = np.column_stack((self.index, self.size, self.arrival, self.departure, self.spent))
+		np.savetxt(file_name, columns, fmt=pktio.TEXT_FORMAT)
+
+class Packet_view:
+	""" A single row of a Packet_table with the attributes of Packet. """
+	__slots__ = ("table", "i")
+
+	def __init__(self, table, i):
+		self.table = table
+		self.i     = i
+
+	@property
+	def index(self):
+		return self.table.index[self.i]
+
+	@property
+	def arrival(self):
+		return self.table.arrival[self.i]
+
+	@property
+	def size(self):
+		return self.table.size[self.i]
+
+	@property
+	def cls(self):
+		return self.table.cls[self.i]
+
+	@property
+	def departure(self):
+		return self.table.departure[self.i]
+
+	@departure.setter
+	def departure(self, value):
+		self.table.departure[self.i] = float(value)
+
+	@property
+	def spent(self):
+		return self.table.spent[self.i]
+
+	@spent.setter
+	def spent(self, value):
+		self.table.spent[self.i] = value
+
+	@property
+	def num_in_sys(self):
+		return self.table.num_in_sys[self.i]
+
+	@num_in_sys.setter
+	def num_in_sys(self, value):
+		self.table.num_in_sys[self.i] = value
+
+	def __str__(self):
+		return "Index: {} Packet size: {} Arrival time: {} Departure time: {} Spent time: {}"\
+			.format(f"{self.index:<6}", f"{self.size:<6}", f"{self.arrival:<12}", f"{self.departure:<12.3f}", f"{self.spent:<12.3f}")
+
 class Source_part_a:
-	def __init__(self, _lambda = 1, npkts = 1000000, size = 1250):
+	def __init__(self, _lambda = 1, npkts = 1000000, size = 1250, seed = None, classes = None):
+		""" classes: probability of each packet class, None puts every packet in class 0. """
 		self._lambda = _lambda
+		self.classes = classes
 		self.packet_count = npkts
-		self.packets = []
+		self.packets = Packet_table()
 		self.size = size
 		self.generated_packets = 0
 		self.current_time = 0
-	
-	def generate(self):
+		# Separate streams for sizes and inter-arrival times, so the packets 
+		# drawn from a seed do not depend on the chunk size
+		if not isinstance(seed, np.random.SeedSequence):
+			seed = np.random.SeedSequence(seed)
+		size_seed, arrival_seed, class_seed = seed.spawn(3)
+		self.rng_size    = np.random.default_rng(size_seed)
+		self.rng_arrival = np.random.default_rng(arrival_seed)
+		self.rng_class   = np.random.default_rng(class_seed)
+
+	def generate_chunks(self, chunk_size = 1000000):
+		"""
+		Draw the packets in blocks of chunk_size, one Packet_table per block.
+		Arrival times are kept on the 0.01 us grid: inter-arrival times are 
+		rounded to integer hundredths and summed exactly as integers.
+		"""
 		while self.generated_packets < self.packet_count:
+			npkts = min(chunk_size, self.packet_count - self.generated_packets)
+			chunk = Packet_table(npkts, self.generated_packets)
 			""" Packet sizes are exponentially distributed with a mean size of 1250 Bytes. """
-			packet_size = round(np.random.exponential(self.size))
+			chunk.size[:] = np.rint(self.rng_size.exponential(self.size, npkts))
 			""" The source generates packets as a Poisson process at a specified rate lambda. """
-			# inter_arrival_time = np.random.poisson(1 / self._lambda)
-			inter_arrival_time = np.random.exponential(1 / self._lambda)
-			arrival_time = round(self.current_time + inter_arrival_time, 2)
-			packet = Packet(self.generated_packets, arrival_time, packet_size)
-			self.generated_packets += 1
-			self.current_time = arrival_time
-			self.packets.append(packet)
+			inter_arrival_time = np.rint(self.rng_arrival.exponential(100 / self._lambda, npkts)).astype(np.int64)
+			arrival_time = round(self.current_time * 100) + np.cumsum(inter_arrival_time)
+			chunk.arrival[:] = arrival_time / 100
+			if self.classes != None:
+				chunk.cls[:] = self.rng_class.choice(len(self.classes), npkts, p=self.classes)
+			self.generated_packets += npkts
+			self.current_time = chunk.arrival[-1]
+			yield chunk
+
+	def state(self):
+		""" Everything generate_chunks needs to carry on from here, for a checkpoint. """
+		return {"generated_packets": self.generated_packets, "current_time": self.current_time,
+				"rng": [rng.bit_generator.state for rng in (self.rng_size, self.rng_arrival, self.rng_class)]}
+
+	def restore(self, state):
+		self.generated_packets = state["generated_packets"]
+		self.current_time = state["current_time"]
+		for rng, rng_state in zip((self.rng_size, self.rng_arrival, self.rng_class), state["rng"]):
+			rng.bit_generator.state = rng_state
+
+	def generate(self, chunk_size = 1000000):
+		self.packets = Packet_table(self.packet_count - self.generated_packets, self.generated_packets)
+		offset = 0
+		for chunk in self.generate_chunks(chunk_size):
+			self.packets.arrival[offset:offset + len(chunk)] = chunk.arrival
+			self.packets.size[offset:offset + len(chunk)] = chunk.size
+			self.packets.cls[offset:offset + len(chunk)] = chunk.cls
+			offset += len(chunk)
 		
 		return self.packets
 
 class Source_part_b:
-	def __init__(self, file_name):
-		self.trace_temp = []
-		self.packets = []
+	def __init__(self, file_name, binary = False):
+		self.packets = Packet_table()
 		self.size = 0
 		self.generated_packets = 0
 		self.current_time = 0
-		self.file_name = f"lab_1_part_b_{file_name}.txt"
-
-	def generate(self, packet_len = None):
-		with open(self.file_name, 'r') as file:
-			for line in file:
-				self.trace_temp = line.strip().split()        
-				inter_arrival_time = float(self.trace_temp[0])
-				packet_size = int(self.trace_temp[1])
-				arrival_time = round(self.current_time + inter_arrival_time, 2)
-				packet = Packet(self.generated_packets, arrival_time, packet_size)
-				self.generated_packets += 1
-				self.current_time = arrival_time
-				self.packets.append(packet)
-				if packet_len:
-					if self.generated_packets >= packet_len:
-						break
-		
+		self.binary = binary
+		if binary:
+			self.file_name = trace.binary_name(file_name)
+		else:
+			self.file_name = trace.text_name(file_name)
+
+	def generate_chunks(self, packet_len = None, chunk_size = 1000000):
+		"""
+		Stream the trace in blocks of chunk_size packets, one Packet_table per block.
+		Each record is "<inter-arrival time> <packet size>". Reading stops after 
+		packet_len packets, the rest of the file is never touched.
+		"""
+		for inter_arrival_time, packet_size in self.blocks(packet_len, chunk_size):
+			chunk = Packet_table(len(packet_size), self.generated_packets)
+			# Arrival times on the 0.01 us grid, summed as integer hundredths
+			inter_arrival_time = np.rint(inter_arrival_time * 100).astype(np.int64)
+			arrival_time = round(self.current_time * 100) + np.cumsum(inter_arrival_time)
+			chunk.arrival[:] = arrival_time / 100
+			chunk.size[:] = packet_size
+			self.generated_packets += len(chunk)
+			self.current_time = chunk.arrival[-1]
+			yield chunk
+
+	def blocks(self, packet_len, chunk_size):
+		""" Records from the trace, after the generated_packets already read. """
+		if self.binary:
+			return trace.read_binary(self.file_name, packet_len, chunk_size, self.generated_packets)
+		return trace.read_text(self.file_name, packet_len, chunk_size, self.generated_packets)
+
+	def state(self):
+		return {"generated_packets": self.generated_packets, "current_time": self.current_time}
+
+	def restore(self, state):
+		self.generated_packets = state["generated_packets"]
+		self.current_time = state["current_time"]
+
+	def generate(self, packet_len = None, chunk_size = 1000000):
+		self.packets = Packet_table.concatenate(list(self.generate_chunks(packet_len, chunk_size)))
 		return self.packets
 
+class Source_lrd(Source_part_b):
+	"""
+	Synthetic long-range dependent source (lab_1_lrd), replayed like a part b 
+	trace. rate in packets/us, npkts is used when packet_len is not given.
+	"""
+	def __init__(self, model = "onoff", hurst = 0.8, rate = 0.8, npkts = 1000000, seed = None):
+		super().__init__(f"{model}_H{hurst}")
+		self.file_name = None
+		self.model = model
+		self.hurst = hurst
+		self.rate  = rate
+		self.packet_count = npkts
+		# A fixed seed, so the same traffic can be made again on resume
+		self.seed  = np.random.SeedSequence(seed).entropy
+
+	def state(self):
+		return dict(super().state(), seed=self.seed)
+
+	def restore(self, state):
+		super().restore(state)
+		self.seed = state["seed"]
+
+	def blocks(self, packet_len, chunk_size):
+		""" The generator state is not kept, so the generated_packets already read are made again and passed over. """
+		skip = self.generated_packets
+		for inter_arrival_time, packet_size in lrd.blocks(self.model, self.hurst, self.rate, packet_len or self.packet_count,
+														  self.seed, chunk_size):
+			if skip >= len(packet_size):
+				skip -= len(packet_size)
+				continue
+			yield inter_arrival_time[skip:], packet_size[skip:]
+			skip = 0
+
 class Queue:
-	def __init__(self, size = 0):
+	def __init__(self, size = 0, discipline = "fifo", classes = 1, weights = None):
+		""" discipline and weights: see lab_1_discipline, fifo is a plain deque. """
 		self.size  = size
-		self.queue = []
+		self.discipline = discipline
+		self.queue = disc.make(discipline, classes, weights)
 		self.dropped_count = 0 
-		self.num_sys = [0] * 12
-		self.logger = logging.getLogger("sim_log")
+		self.dropped_class = np.zeros(classes, dtype=np.int64)
+		self.event_log = sim_event_log
 
 	def insert(self, packet, service_flag):
-		def ensure_list_size(lst, size):
-			while len(lst) <= size:
-				lst.append(0)
-
+		""" Returns the number of packets found in the system, None if the packet is dropped. """
 		if self.size != 0 and len(self.queue) >= self.size:
 			self.dropped_count += 1
+			self.dropped_class[packet.cls] += 1
 		else: 
 			num_in_Q = len(self.queue)
 			self.queue.append(packet)
@@ -119,17 +359,16 @@ class Queue:
 				num_in_sys = num_in_Q + 1
 			else: 
 				num_in_sys = num_in_Q
-			ensure_list_size(self.num_sys, num_in_sys)
-			self.num_sys[num_in_sys] += 1
 			# print("Time: {} ARRIVAL    Index: {} Packet size:{} Find {} packets in the Queue and {} in the system"\
 			# 	.format(f"{sys_clk:<12.3f}", f"{packet.index:<6}", f"{packet.size:<6}", num_in_Q, num_in_sys))
 
-			self.logger.info("Time: {} ARRIVAL    Index: {} Packet size:{} Find {} packets in the Queue and {} in the system"\
-				.format(f"{sys_clk:<12.3f}", f"{packet.index:<6}", f"{packet.size:<6}", num_in_Q, num_in_sys))
+			if self.event_log != None:
+				self.event_log.arrival(sys_clk, packet.index, packet.size, num_in_Q, num_in_sys)
+			return num_in_sys
 
 	def extract(self):
 		if len(self.queue) != 0:
-			return self.queue.pop(0)
+			return self.queue.popleft()
 
 	def dropped(self):
 		return self.dropped_count
@@ -137,110 +376,130 @@ class Queue:
 	def __str__(self):
 		return self.queue[0]
 
+# Server states and the events of one tick, see Server.service
+INITIAL, GET_PACKET, SERVE = 0, 1, 2
+STATE_NAMES = ["INITIAL", "GET_PACKET", "SERVE"]
+NO_EVENT, PACKET_GOT, PACKET_SERVED = 0, 1, 2
+
+# Next state by [state][event]
+TRANSITIONS = (
+	(GET_PACKET, GET_PACKET, GET_PACKET),	# INITIAL
+	(GET_PACKET, SERVE,      GET_PACKET),	# GET_PACKET
+	(SERVE,      SERVE,      GET_PACKET),	# SERVE
+)
+
 class Server:
-	def __init__(self, packet_len, service_rate = 1250):
+	def __init__(self, packet_len, service_rate = 1250, classes = 1):
 		# The server can process 10Gbps -> 10*10^9 bps -> 10*10^3 bits per us -> 1250 Bytes per us
 		self.service_rate  = service_rate
 		self.current_time  = 0
 		self.packet        = None
 		self.packet_served = 0
-		self.state_current = "INITIAL"
-		self.state_next    = "INITIAL"
-		self.state_flag    = None
+		self.state_current = INITIAL
+		self.state_flag    = NO_EVENT
 		self.time_flag     = 1
 		self.time_temp     = 0
 		self.service_flag = "IDLE"
 		self.service_end   = 0
-		self.logger = logging.getLogger("sim_log")
+		self.stats = stats.Online_stats()
+		# Per-class statistics, only kept with more than one class
+		self.class_stats = None
+		if classes > 1:
+			self.class_stats = [stats.Online_stats() for i in range(classes)]
+		self.event_log = sim_event_log
+
+	def arrival(self, packet, num_in_sys):
+		""" A packet that was not dropped found num_in_sys packets in the system. """
+		packet.num_in_sys = num_in_sys
+		self.stats.arrival(num_in_sys)
+		if self.class_stats != None:
+			self.class_stats[packet.cls].arrival(num_in_sys)
 
 	def service(self, queue, service_flag, packet_flag):
 		"""
-		State Transfer
+		One clock tick of the tick engine: the handler of the current state runs,
+		then TRANSITIONS[state][event] gives the next state.
 		# INITIAL -> GET_PACKET -> SERVE -> GET_PACKET
+		state_flag is the event of this tick, PACKET_SERVED when a packet left.
 		"""
-
-		def state_update(self): 
-			self.state_current = self.state_next
-
-		def state_transfer(self):
-			match self.state_current:
-				case "INITIAL":
-					self.state_next = "GET_PACKET"
-				case "GET_PACKET":
-					if self.state_flag == "packet_getted":
-						self.service_flag = "SERVING"
-						self.state_next = "SERVE"
-					else: 
-						self.state_next = "GET_PACKET"
-				case "SERVE":
-					if self.state_flag == "packet_served":
-						self.service_flag = "IDLE"
-						self.state_next = "GET_PACKET"
-						if packet_flag == "to_END":
-							self.service_end = 1
-					else:
-						self.state_next = "SERVE"
-				case _:
-					self.state_next = "INITIAL"
-
-		def state_initial(self):
-			self.packet = None
-			self.state_flag = None
-			self.time_flag = 1
-			self.time_temp = 0
-
-		def state_get_packet(self, queue):
-			packet_temp = queue.extract()
-			if packet_temp != None:
-				# print(packet_temp)
-				self.packet = packet_temp
-				self.state_flag = "packet_getted"
-
-		def state_serve(self):
-			self.current_time = sys_clk
-			if self.time_flag:
-				self.time_temp = self.current_time
-				self.service_time = round(self.packet.size / self.service_rate, 3)
-				self.time_flag = 0
-			# self.logger.info(f"{service_flag} packet {self.packet.index}")
-			time_delta = self.current_time - self.time_temp
-			if  time_delta >= self.service_time:
-				self.packet.departure = f"{self.current_time:.3f}"
-				self.packet.spent = self.current_time - self.packet.arrival
-				# self.state_flag = "packet_served"
-				self.packet_served += 1
-				# print("Time: {} DEPARTURE  Index: {} Packet size:{} Spent {} us in the system"\
-				# 	.format(f"{sys_clk:<12.3f}", f"{self.packet.index:<6}", f"{self.packet.size:<6}", f"{self.packet.spent:.3f}"))
-
-				self.logger.info("Time: {} DEPARTURE  Index: {} Packet size:{} Spent {} us in the system"\
-					.format(f"{sys_clk:<12.3f}", f"{self.packet.index:<6}", f"{self.packet.size:<6}", f"{self.packet.spent:.3f}"))
-				state_initial(self)
-				self.state_flag = "packet_served"
-
-		# print(f"Current State: {self.state_current}")
-		match self.state_current:
-			case "INITIAL":
-				state_initial(self)
-			case "GET_PACKET":
-				state_get_packet(self, queue)
-			case "SERVE":
-				state_serve(self)
-			case _:
-				state_initial(self)
-		state_transfer(self)
-		state_update(self)
+		event = self.handlers[self.state_current](self, queue, packet_flag)
+		self.state_flag = event
+		self.state_current = TRANSITIONS[self.state_current][event]
 		return self.service_flag
 
-	def summary(self, file_addr, file_ind, queue, packets):
-		sum_file = f"{file_addr}/sum.log"
+	def state_initial(self, queue, packet_flag):
+		self.packet = None
+		self.time_flag = 1
+		self.time_temp = 0
+		return NO_EVENT
+
+	def state_get_packet(self, queue, packet_flag):
+		packet = queue.extract()
+		if packet == None:
+			return NO_EVENT
+		self.packet = packet
+		self.service_flag = "SERVING"
+		return PACKET_GOT
+
+	def state_serve(self, queue, packet_flag):
+		# The service starts on the first tick in SERVE
+		if self.time_flag:
+			self.time_temp = sys_clk
+			self.service_time = round(self.packet.size / self.service_rate, 3)
+			self.time_flag = 0
+		if sys_clk - self.time_temp < self.service_time:
+			return NO_EVENT
+		self.depart()
+		self.time_flag = 1
+		self.time_temp = 0
+		if packet_flag == "to_END":
+			self.service_end = 1
+		return PACKET_SERVED
+
+	# Handler of each state, indexed by the state code
+	handlers = (state_initial, state_get_packet, state_serve)
+
+	def start(self, packet):
+		"""
+		Event engine: take a packet into service at the current sys_clk and 
+		return its service time.
+		"""
+		self.packet = packet
+		self.service_flag = "SERVING"
+		self.time_temp = sys_clk
+		self.service_time = round(self.packet.size / self.service_rate, 3)
+		return self.service_time
+
+	def depart(self):
+		"""
+		Event engine: the packet in service leaves the system at the current sys_clk.
+		Returns the packet.
+		"""
+		self.current_time = sys_clk
+		self.packet.departure = f"{self.current_time:.3f}"
+		self.packet.spent = self.current_time - self.packet.arrival
+		self.packet_served += 1
+		self.stats.departure(self.packet.spent, self.current_time, self.time_temp - self.packet.arrival)
+		if self.class_stats != None:
+			self.class_stats[self.packet.cls].departure(self.packet.spent, self.current_time, self.time_temp - self.packet.arrival)
+		if self.event_log != None:
+			self.event_log.departure(sys_clk, self.packet.index, self.packet.size, self.packet.spent)
+		packet = self.packet
+		self.packet = None
+		self.service_flag = "IDLE"
+		return packet
+
+	def summary(self, file_addr, file_ind, queue):
+		""" 
+		Everything comes from the streaming statistics in self.stats, the packets are not needed. 
+		Appends to sum.log and writes the same numbers, with the delay histogram, to sum.json.
+		"""
+		sum_file  = f"{file_addr}/sum.log"
+		json_file = f"{file_addr}/sum.json"
 		N_total = self.packet_served
-		T_total = 0
-		for i in range(len(packets)):
-			if packets[i].spent != None:
-				T_total += packets[i].spent
-		T  = T_total / N_total
-		N  = 0
-		n  = queue.num_sys
+		T  = self.stats.T()
+		N  = self.stats.N()
+		n  = self.stats.num_sys.tolist()
 		P  = [0 for i in range(len(n))]
 		Pn = [0 for i in range(len(n))]
 		for i in range(len(n)):
@@ -251,13 +510,29 @@ class Server:
 				Pn[i] = f"{P[i]*(10**3):.3f}m" # m%
 			else:
 				Pn[i] = f"{P[i]:.3f}"          #  %
-			N += P[i] * i
+		pct = self.stats.percentiles()
+		tail = [f"{"percentiles (us):":<24}" + "".join(f"{name:<12}" for name in stats.PERCENTILE_NAMES),
+				f"{"time in system T:":<24}" + "".join(f"{value:<12.3f}" for value in pct["T"].values()),
+				f"{"waiting time W:":<24}" + "".join(f"{value:<12.3f}" for value in pct["W"].values())]
+		classes = []
+		if self.class_stats != None:
+			tail.append(f"per-class statistics, {queue.discipline} discipline:")
+			tail.append(f"{"class":<8}{"served":<10}{"dropped":<10}{"N":<9}{"T (us)":<10}{"W (us)":<10}{"p99 T":<10}{"p99 W":<10}")
+			for c, class_stats in enumerate(self.class_stats):
+				class_pct = class_stats.percentiles()
+				classes.append({"class": c, "served": class_stats.served, "dropped": int(queue.dropped_class[c]),
+								"N": class_stats.N(), "T": class_stats.T(), "W": class_stats.W(), "percentiles": class_pct})
+				tail.append(f"{c:<8}{class_stats.served:<10}{queue.dropped_class[c]:<10}{class_stats.N():<9.3f}{class_stats.T():<10.3f}"
+							f"{class_stats.W():<10.3f}{class_pct["T"]["p99"]:<10.3f}{class_pct["W"]["p99"]:<10.3f}")
 
 		with open(sum_file, 'a') as f:
 			f.write(f"Summary for {file_ind}:\n")
 			f.write(f"-------------------------------------------\n")
 			f.write(f"average number of packets in the system N: {N:.2f}\n")
 			f.write(f"average time spent by a packet in the system T: {T:.3f} us\n")
+			f.write(f"time-average number of packets in the system: {self.stats.N_time():.2f}\n")
+			f.write(f"average waiting time of a packet in the queue W: {self.stats.W():.3f} us\n")
+			f.write("\n".join(tail) + "\n")
 			f.write(f"probability P(n) (%) that an arriving packet finds n packets already in the system:\n")
 			f.write(f"{"   n:":<8}{"0":<8}{"1":<8}{"2":<8}{"3":<8}{"4":<8}{"5":<8}{"6":<8}{"7":<8}{"8":<8}{"9":<8}{"10":<8}{">10":<8}Total \n")
 			f.write(f"{" num:":<8}{n[0]:<8}{n[1]:<8}{n[2]:<8}{n[3]:<8}{n[4]:<8}{n[5]:<8}{n[6]:<8}{n[7]:<8}{n[8]:<8}{n[9]:<8}{n[10]:<8}{sum(n[11:]):<8}{sum(n)}\n")
@@ -267,7 +542,19 @@ class Server:
 		print("-------------------------------------------")
 		print(f"average number of packets in the system N: {N:.2f}")
 		print(f"average time spent by a packet in the system T: {T:.3f} us")
+		print(f"time-average number of packets in the system: {self.stats.N_time():.2f}")
+		print(f"average waiting time of a packet in the queue W: {self.stats.W():.3f} us")
+		print("\n".join(tail))
 		print(f"probability P(n) (%) that an arriving packet finds n packets already in the system: ")
 		print(f"{"   n:":<8}{"0":<8}{"1":<8}{"2":<8}{"3":<8}{"4":<8}{"5":<8}{"6":<8}{"7":<8}{"8":<8}{"9":<8}{"10":<8}{">10":<8}Total \n")
 		print(f"{" num:":<8}{n[0]:<8}{n[1]:<8}{n[2]:<8}{n[3]:<8}{n[4]:<8}{n[5]:<8}{n[6]:<8}{n[7]:<8}{n[8]:<8}{n[9]:<8}{n[10]:<8}{sum(n[11:]):<8}{sum(n)}\n")
 		print(f"{"P(n):":<8}{Pn[0]:<8}{Pn[1]:<8}{Pn[2]:<8}{Pn[3]:<8}{Pn[4]:<8}{Pn[5]:<8}{Pn[6]:<8}{Pn[7]:<8}{Pn[8]:<8}{Pn[9]:<8}{Pn[10]:<8}{sum(P[11:]):<8}{sum(P)}\n")
+
+		result = {"N": N, "T": T, "served": N_total, "dropped": queue.dropped_count, "num_sys": n, "P": P,
+				  "N_time": self.stats.N_time(), "T_std": self.stats.T_std(), "W": self.stats.W(),
+				  "percentiles": pct}
+		if classes:
+			result["classes"] = classes
+		with open(json_file, 'w') as f:
+			json.dump(dict(result, name=file_ind, delay_histogram=self.stats.delay_histogram()), f)
+		return result
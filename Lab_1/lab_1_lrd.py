@@ -0,0 +1,170 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_lrd.py
+Description: Synthetic long-range dependent traffic for part b, with Hurst
+             parameter H in (0.5, 1). Yields (inter-arrival, size) blocks, the
+             same as the trace readers in lab_1_trace, so Source_lrd runs
+             through the same path as a trace replay.
+             fgn   - packets per slot = rate * slot + fractional Gaussian noise
+                     (Davies-Harte circulant embedding, one FFT per block of
+                     slots), spread uniformly inside the slot. Blocks are
+                     independent, the correlation holds up to block * slot us.
+             onoff - superposition of Pareto ON/OFF sources, ON and OFF periods
+                     with tail index alpha = 3 - 2H, constant spacing while ON.
+                     Source state carries over, so the LRD has no cut-off.
+             Packet sizes are exponential with a mean of 1250 Bytes, as in part a.
+             python lab_1_lrd.py --model onoff --hurst 0.8 --npkts 10000000 --traceNumber lrd
+             writes lab_1_part_b_lrd.bin for lab_1_part_b.py --binary.
+Dependencies: lab_1_trace, numpy, argparse, time
+"""
+
+import lab_1_trace as trace
+import numpy as np
+import argparse
+import time
+
+MODELS = ["fgn", "onoff"]
+
+def fgn_autocovariance(hurst, n):
+    k = np.arange(n + 1, dtype=np.float64)
+    return 0.5 * (np.abs(k + 1) ** (2 * hurst) - 2 * k ** (2 * hurst) + np.abs(k - 1) ** (2 * hurst))
+
+def fgn_eigenvalues(hurst, n):
+    """ Eigenvalues of the 2n circulant embedding of the fGn covariance, computed once per H and n. """
+    gamma = fgn_autocovariance(hurst, n)
+    row = np.concatenate((gamma, gamma[-2:0:-1]))
+    eigenvalues = np.fft.rfft(row).real
+    if eigenvalues.min() < -1e-9:
+        raise ValueError(f"Davies-Harte embedding is not positive definite for H = {hurst}")
+    return np.maximum(eigenvalues, 0)
+
+def fgn(rng, hurst, n, eigenvalues = None):
+    """ n samples of zero mean, unit variance fractional Gaussian noise. """
+    if eigenvalues is None:
+        eigenvalues = fgn_eigenvalues(hurst, n)
+    m = 2 * n
+    w = rng.standard_normal(len(eigenvalues)) + 1j * rng.standard_normal(len(eigenvalues))
+    w[0] = w[0].real * np.sqrt(2)
+    w[-1] = w[-1].real * np.sqrt(2)
+    x = np.fft.irfft(np.sqrt(eigenvalues / 2) * w, m) * np.sqrt(m)
+    return x[:n]
+
+def fgn_arrivals(rng, hurst, rate, slot = 10.0, cv = 0.5, block = 1 << 20):
+    """
+    Yield blocks of arrival times (us). rate in packets/us, cv is the
+    coefficient of variation of the packets per slot before the counts are
+    rounded and cut at zero.
+    """
+    eigenvalues = fgn_eigenvalues(hurst, block)
+    mean = rate * slot
+    start = 0.0
+    while True:
+        counts = np.rint(mean + cv * mean * fgn(rng, hurst, block, eigenvalues))
+        counts = np.maximum(counts, 0).astype(np.int64)
+        slots = np.repeat(np.arange(block, dtype=np.float64), counts)
+        # Sorting slot + offset keeps the slots in order and sorts inside each slot
+        arrival = start + np.sort(slots + rng.random(len(slots))) * slot
+        start += block * slot
+        yield arrival
+
+class Pareto_onoff:
+    """ M sources, each alternates Pareto ON and OFF periods of the same mean. """
+    def __init__(self, rng, hurst, rate, sources = 32, period = 100.0):
+        self.rng     = rng
+        self.alpha   = 3 - 2 * hurst
+        self.scale   = period * (self.alpha - 1) / self.alpha
+        # Half the time ON, so every source sends at twice its share while ON
+        self.spacing = sources / (2 * rate)
+        self.sources = sources
+        # Random phase, so the sources do not start in step
+        self.time  = self.rng.random(sources) * period
+        self.on    = self.rng.random(sources) < 0.5
+        self.carry = np.zeros(0)
+
+    def periods(self, n):
+        return (self.rng.pareto(self.alpha, n) + 1) * self.scale
+
+    def source_arrivals(self, s, until):
+        """ Arrival times of source s from its current time to past until. """
+        blocks = []
+        while self.time[s] < until:
+            n = 256
+            lengths = self.periods(n)
+            ends = self.time[s] + np.cumsum(lengths)
+            # Periods alternate starting from the current state
+            on = (np.arange(n) % 2 == 0) == self.on[s]
+            starts = ends - lengths
+            # Random rounding keeps the mean at length / spacing packets per ON period
+            npkts = np.where(on, np.floor(lengths / self.spacing + self.rng.random(n)), 0).astype(np.int64)
+            first = np.repeat(starts, npkts)
+            offset = np.arange(npkts.sum()) - np.repeat(np.cumsum(npkts) - npkts, npkts)
+            blocks.append(first + offset * self.spacing)
+            self.time[s] = ends[-1]
+            self.on[s] = not on[-1]
+        return blocks
+
+    def arrivals(self, window = 100000.0):
+        """ Yield the arrival times of every window us. """
+        end = 0.0
+        while True:
+            end += window
+            blocks = [self.carry]
+            for s in range(self.sources):
+                blocks += self.source_arrivals(s, end)
+            arrival = np.sort(np.concatenate(blocks))
+            cut = np.searchsorted(arrival, end)
+            self.carry = arrival[cut:]
+            yield arrival[:cut]
+
+def blocks(model, hurst, rate, npkts, seed = None, chunk_size = 1000000, size = 1250):
+    """ Yield (inter_arrival, size) arrays of up to chunk_size packets, npkts in total. """
+    if not 0.5 < hurst < 1:
+        raise ValueError(f"Hurst parameter must be in (0.5, 1), got {hurst}")
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    arrival_seed, size_seed = seed.spawn(2)
+    rng_arrival = np.random.default_rng(arrival_seed)
+    rng_size    = np.random.default_rng(size_seed)
+    match model:
+        case "fgn":
+            arrivals = fgn_arrivals(rng_arrival, hurst, rate)
+        case "onoff":
+            arrivals = Pareto_onoff(rng_arrival, hurst, rate).arrivals()
+        case _:
+            raise ValueError(f"Unknown model: {model}")
+
+    last = 0.0
+    pending = np.zeros(0)
+    generated = 0
+    while generated < npkts:
+        while len(pending) < chunk_size and generated + len(pending) < npkts:
+            pending = np.concatenate((pending, next(arrivals)))
+        arrival = pending[:min(chunk_size, npkts - generated)]
+        pending = pending[len(arrival):]
+        inter_arrival = np.diff(arrival, prepend=last)
+        last = arrival[-1]
+        generated += len(arrival)
+        yield inter_arrival, np.rint(rng_size.exponential(size, len(arrival)))
+
+if __name__ == "__main__":
+    # Create the parser
+    parser = argparse.ArgumentParser(description="Write a synthetic LRD trace in the binary trace format")
+
+    # Add arguments
+    parser.add_argument("--model"      , type=str  , default="onoff", choices=MODELS, help="Traffic model")
+    parser.add_argument("--hurst"      , type=float, default=0.8    , help="Hurst parameter, 0.5 < H < 1")
+    parser.add_argument("--rate"       , type=float, default=0.8    , help="Mean arrival rate, packets/us")
+    parser.add_argument("--npkts"      , type=int  , default=1000000, help="npkts")
+    parser.add_argument("--seed"       , type=int  , default=None   , help="Random seed")
+    parser.add_argument("--traceNumber", type=str  , default="lrd"  , help="Writes lab_1_part_b_<traceNumber>.bin")
+
+    # Parse the arguments
+    args = parser.parse_args()
+
+    start_time = time.time()
+    file_name = trace.binary_name(args.traceNumber)
+    count = trace.write_binary(file_name, blocks(args.model, args.hurst, args.rate, args.npkts, args.seed))
+    elapsed_time = time.time() - start_time
+    print(f"{args.model}, H = {args.hurst} -> {file_name}: {count} packets. Time Usage: {elapsed_time} s")
@@ -0,0 +1,257 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_network.py
+Description: Queueing networks of lab 1 nodes. A Node is one Queue in front of
+             c parallel Servers (M/M/c, or M/M/c/K with a finite queue), nodes
+             are chained with Node.connect, e.g. edge -> aggregation -> core.
+             A packet keeps its size, so its service time at every hop is
+             size / service rate of that node.
+             event    - one event scheduler for all nodes, any c and queue size.
+             analytic - Lindley recursion node after node, chunk by chunk,
+                        single server nodes with infinite buffers only.
+             Every node keeps its own Online_stats (per hop), the network
+             keeps the end-to-end ones.
+Dependencies: lab_1_functions, lab_1_engine, lab_1_stats, numpy, argparse, os, time, tqdm
+"""
+
+import lab_1_functions as f
+import lab_1_engine as e
+import lab_1_stats as stats
+import numpy as np
+import argparse
+import os
+import time
+from tqdm import tqdm
+
+ENGINES = ["auto", "event", "analytic"]
+
+class Node:
+    def __init__(self, name, servers = 1, queue_size = 0, service_rate = 1250):
+        self.name    = name
+        self.queue   = f.Queue(queue_size)
+        self.servers = [f.Server(0, service_rate) for i in range(servers)]
+        self.service_rate = service_rate
+        self.idle    = list(range(servers))[::-1]
+        self.busy_time = 0
+        self.stats   = stats.Online_stats()
+        self.next    = None
+        # The per-event log is for the single queue of part a / part b
+        self.queue.event_log = None
+        for server in self.servers:
+            server.event_log = None
+
+    def connect(self, node):
+        """ Packets leaving this node go to node, returns node so calls can be chained. """
+        self.next = node
+        return node
+
+    def busy(self):
+        return len(self.servers) - len(self.idle)
+
+    def __str__(self):
+        return f"{self.name} (c = {len(self.servers)}, queue = {self.queue.size}, rate = {self.service_rate} Bytes/us)"
+
+class Network:
+    """ The nodes reachable from entry, in path order. """
+    def __init__(self, entry):
+        self.nodes = []
+        node = entry
+        while node != None:
+            if node in self.nodes:
+                raise ValueError(f"node {node.name} is visited twice, only feed-forward networks are supported")
+            self.nodes.append(node)
+            node = node.next
+        self.stats = stats.Online_stats()
+
+    def analytic(self):
+        """ The analytic engine needs one server and an infinite buffer at every node. """
+        return all(len(node.servers) == 1 and node.queue.size == 0 for node in self.nodes)
+
+    def dropped(self):
+        return sum(node.queue.dropped_count for node in self.nodes)
+
+    def summary(self, file_addr, file_ind):
+        lines = [
+            f"Network summary for {file_ind}:",
+            f"-------------------------------------------",
+            f"{'node':<14}{'c':<4}{'queue':<7}{'served':<10}{'dropped':<10}{'N':<9}{'N_time':<9}"
+            f"{'T (us)':<10}{'W (us)':<10}{'p99 T':<10}{'util.':<8}",
+        ]
+        nodes = []
+        for node in self.nodes:
+            c = len(node.servers)
+            utilisation = node.busy_time / (c * node.stats.end_time) if node.stats.end_time else 0
+            lines.append(f"{node.name:<14}{c:<4}{node.queue.size:<7}{node.stats.served:<10}{node.queue.dropped_count:<10}"
+                         f"{node.stats.N():<9.3f}{node.stats.N_time():<9.3f}{node.stats.T():<10.3f}{node.stats.W():<10.3f}"
+                         f"{node.stats.percentile(0.99):<10.3f}{utilisation:<8.3f}")
+            nodes.append({"name": node.name, "servers": c, "queue": node.queue.size, "served": node.stats.served,
+                          "dropped": node.queue.dropped_count, "N": node.stats.N(), "N_time": node.stats.N_time(),
+                          "T": node.stats.T(), "W": node.stats.W(), "utilisation": utilisation,
+                          "percentiles": node.stats.percentiles()})
+        pct = self.stats.percentiles()
+        lines += [
+            f"end-to-end: served {self.stats.served}, dropped {self.dropped()}",
+            f"average time spent by a packet in the network T: {self.stats.T():.3f} us",
+            f"average waiting time of a packet in the queues W: {self.stats.W():.3f} us",
+            f"{'percentiles (us):':<24}" + "".join(f"{name:<12}" for name in stats.PERCENTILE_NAMES),
+            f"{'time in network T:':<24}" + "".join(f"{value:<12.3f}" for value in pct["T"].values()),
+        ]
+        with open(f"{file_addr}/sum.log", 'a') as file:
+            file.write("\n".join(lines) + "\n")
+        print("\n\n\n" + "\n".join(lines))
+        return {"nodes": nodes, "served": self.stats.served, "dropped": self.dropped(),
+                "T": self.stats.T(), "W": self.stats.W(), "percentiles": pct}
+
+def tandem(specs):
+    """ specs: (name, servers, queue_size, service_rate) per node, in path order. """
+    nodes = [Node(*spec) for spec in specs]
+    for node, next_node in zip(nodes, nodes[1:]):
+        node.connect(next_node)
+    return Network(nodes[0])
+
+def run_event(packets, network):
+    """
+    Arrivals at a node are events too, so a departure and an arrival at the
+    same node and time are ordered as in lab_1_engine.run_event.
+    """
+    npkts = len(packets)
+    nodes = network.nodes
+    first = packets.index[0] if npkts else 0
+    hop_arrival = np.zeros(npkts)   # time the packet entered its current node
+    waited      = np.zeros(npkts)   # waiting time summed over the hops
+    scheduler = e.Event_scheduler()
+    if npkts:
+        scheduler.push(packets.arrival[0], e.ARRIVAL, (0, packets[0]))
+
+    def start(k, node, clk):
+        while node.idle and node.queue.queue:
+            s = node.idle.pop()
+            service_time = node.servers[s].start(node.queue.extract())
+            node.busy_time += service_time
+            scheduler.push(round(clk + service_time, 3), e.DEPARTURE, (k, s))
+
+    packet_served_progress = tqdm(range(npkts), desc="Packets served progress", position=0, leave=True, disable=not e.show_progress)
+    while scheduler:
+        clk, kind, _, (k, data) = scheduler.pop()
+        f.System_clk(clk)
+        node = nodes[k]
+
+        if kind == e.DEPARTURE:
+            server = node.servers[data]
+            packet = server.depart()
+            node.idle.append(data)
+            i = packet.index - first
+            wait = server.time_temp - hop_arrival[i]
+            node.stats.departure(clk - hop_arrival[i], clk, wait)
+            waited[i] += wait
+            if k + 1 < len(nodes):
+                scheduler.push(clk, e.ARRIVAL, (k + 1, packet))
+            else:
+                network.stats.departure(clk - packet.arrival, clk, waited[i])
+                packet_served_progress.update(1)
+        else:
+            packet = data
+            if k == 0:
+                i = packet.index - first + 1
+                if i < npkts:
+                    scheduler.push(packets.arrival[i], e.ARRIVAL, (0, packets[i]))
+            num_in_Q = node.queue.insert(packet, "IDLE")
+            if num_in_Q != None:
+                node.stats.arrival(num_in_Q + node.busy())
+                hop_arrival[packet.index - first] = clk
+            else:
+                # Dropped, the packet leaves the network
+                packet_served_progress.update(1)
+
+        start(k, node, clk)
+
+    for node in nodes:
+        for server in node.servers:
+            server.service_end = 1
+
+def run_analytic_chunks(chunks, network):
+    """
+    Lindley recursion at every node in turn, the departures of a node are the
+    arrivals of the next. FIFO single servers keep the packet order, so the
+    chunks stay in order at every hop and each node only keeps its own backlog.
+    """
+    if not network.analytic():
+        raise ValueError("analytic engine only supports single server nodes with an infinite buffer")
+
+    backlogs = [np.zeros(0) for node in network.nodes]
+    for packets in chunks:
+        if len(packets) == 0:
+            continue
+        arrival = packets.arrival
+        waited  = np.zeros(len(packets))
+        for k, node in enumerate(network.nodes):
+            service = np.round(packets.size / node.service_rate, 3)
+            departure, wait, num_in_sys = e.lindley(arrival, service, backlogs[k])
+            node.servers[0].packet_served += len(packets)
+            node.busy_time += float(service.sum())
+            node.stats.arrivals(num_in_sys)
+            node.stats.departures(departure - arrival, departure[-1], wait)
+            waited += wait
+            backlog = np.concatenate((backlogs[k], departure))
+            backlogs[k] = backlog[backlog > arrival[-1]]
+            arrival = departure
+
+        packets.departure[:] = arrival
+        packets.spent[:] = arrival - packets.arrival
+        network.stats.departures(packets.spent, arrival[-1], waited)
+        f.System_clk(arrival[-1])
+
+def run(engine, source, network):
+    match engine:
+        case "event":
+            run_event(source.generate(), network)
+        case "analytic":
+            run_analytic_chunks(source.generate_chunks(), network)
+        case _:
+            raise ValueError(f"Unknown engine: {engine}")
+
+def parse_node(spec):
+    """ name[:servers[:queue[:rate]]], e.g. core:4:20:5000 """
+    fields = spec.split(":")
+    if not 1 <= len(fields) <= 4:
+        raise argparse.ArgumentTypeError(f"bad node {spec!r}, expected name[:servers[:queue[:rate]]]")
+    defaults = [None, 1, 0, 1250]
+    fields += [str(value) for value in defaults[len(fields):]]
+    try:
+        return (fields[0], int(fields[1]), int(fields[2]), float(fields[3]))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad node {spec!r}, expected name[:servers[:queue[:rate]]]")
+
+if __name__ == "__main__":
+    # Create the parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument("--_lambda", type=float, default=1.0    , help="lambda")
+    parser.add_argument("--npkts"  , type=int  , default=1000000, help="npkts")
+    parser.add_argument("--seed"   , type=int  , default=None   , help="Random seed")
+    parser.add_argument("--nodes"  , type=parse_node, nargs="+", default=[("edge", 1, 0, 1250), ("aggregation", 1, 0, 1250), ("core", 1, 0, 1250)],
+                        help="Tandem path, one name[:servers[:queue[:rate]]] per node, rate in Bytes/us")
+    parser.add_argument("--engine" , type=str  , default="auto" , choices=ENGINES,
+                        help="auto uses analytic when every node has one server and an infinite buffer")
+    parser.add_argument("--output" , type=str  , default="network", help="Output directory")
+
+    # Parse the arguments
+    args = parser.parse_args()
+
+    network = tandem(args.nodes)
+    engine = args.engine
+    if engine == "auto":
+        engine = "analytic" if network.analytic() else "event"
+    if engine == "analytic" and not network.analytic():
+        parser.error("--engine analytic needs one server and an infinite buffer (queue 0) at every node")
+
+    print(f"lambda = {args._lambda}, " + " -> ".join(str(node) for node in network.nodes))
+    os.makedirs(args.output, exist_ok=True)
+    start_time = time.time()
+    run(engine, f.Source_part_a(args._lambda, args.npkts, seed=args.seed), network)
+    network.summary(args.output, f"lambda = {args._lambda}, {engine} engine")
+    elapsed_time = time.time() - start_time
+    print(f"End Running. Time Usage: {elapsed_time} s")
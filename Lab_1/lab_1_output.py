@@ -0,0 +1,213 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_output.py
+Description: Output directories of part a / part b runs. A run goes to
+             <root>/<name>-<key>, key being a hash of its parameters (seed,
+             and the size and modification time of the trace, included), so
+             runs with other parameters never share a directory and can run
+             at the same time. root is --output, else $LAB_1_OUTPUT, else log/
+             next to this file. Point it at tmpfs or NVMe scratch for large runs.
+             manifest.json in the run directory holds the parameters, the code
+             version (git commit and a hash of the lab_1_*.py sources), start
+             and end time, elapsed time and the files written with their sizes.
+             A complete run with the same parameters and sources is a cached
+             result and is not simulated again. part a / part b draw a seed
+             for a run without one, so it gets a directory of its own.
+             run.lock keeps a second run with the same key out while one is going.
+             python lab_1_output.py --output <root> lists the runs under root.
+Dependencies: argparse, datetime, glob, hashlib, json, os, platform, shutil, subprocess, sys, time
+"""
+
+import argparse
+import datetime
+import glob
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+VERSION  = 1
+MANIFEST = "manifest.json"
+LOCK     = "run.lock"
+
+def default_root():
+    return os.environ.get("LAB_1_OUTPUT") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "log")
+
+def file_identity(file_name):
+    """ Size and modification time of an input file, a changed trace gives another key. """
+    info = os.stat(file_name)
+    return {"file": os.path.basename(file_name), "file_size": info.st_size, "mtime": info.st_mtime}
+
+def run_key(params):
+    text = json.dumps({"version": VERSION, "params": params}, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()[:12]
+
+def source_hash():
+    """ Hash of every lab_1_*.py next to this file. """
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "lab_1_*.py"))):
+        with open(path, 'rb') as file:
+            digest.update(os.path.basename(path).encode())
+            digest.update(file.read())
+    return digest.hexdigest()[:12]
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def code_version():
+    return {"commit": git_commit(), "sources": source_hash()}
+
+def now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+def load_manifest(file_addr):
+    """ manifest.json of a run directory, None if there is none (or half of one). """
+    try:
+        with open(os.path.join(file_addr, MANIFEST), 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def save_manifest(file_addr, manifest):
+    # Written next to the old manifest and renamed, a crash never leaves half a manifest
+    file_name = os.path.join(file_addr, MANIFEST)
+    with open(f"{file_name}.tmp", 'w') as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(f"{file_name}.tmp", file_name)
+
+def stale(holder):
+    """ The lock holder is gone. Only known for a process on this host, and not on Windows. """
+    if holder.get("host") != platform.node() or os.name == "nt":
+        return False
+    try:
+        os.kill(holder["pid"], 0)
+    except ProcessLookupError:
+        return True
+    except (PermissionError, KeyError, TypeError):
+        return False
+    return False
+
+def acquire(file_addr):
+    lock_file = os.path.join(file_addr, LOCK)
+    for attempt in range(2):
+        try:
+            fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                with open(lock_file, 'r') as file:
+                    holder = json.load(file)
+            except (OSError, ValueError):
+                holder = {}
+            if attempt == 0 and stale(holder):
+                os.remove(lock_file)
+                continue
+            raise RuntimeError(f"{file_addr} is in use by process {holder.get('pid')} on {holder.get('host')}, "
+                               f"remove {LOCK} if that run is gone")
+        with os.fdopen(fd, 'w') as file:
+            json.dump({"host": platform.node(), "pid": os.getpid(), "started": now()}, file)
+        return
+
+def release(file_addr):
+    lock_file = os.path.join(file_addr, LOCK)
+    if os.path.exists(lock_file):
+        os.remove(lock_file)
+
+def empty_directory(file_addr):
+    """ Remove everything in file_addr but the lock. """
+    for name in os.listdir(file_addr):
+        path = os.path.join(file_addr, name)
+        if name == LOCK:
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+class Run:
+    """
+    Output directory of one run. cached is True when a complete run with the
+    same parameters and sources is already there. Otherwise
+    with run.start(resume): ... locks the directory (emptied unless resume)
+    and marks the run complete, or failed, at the end.
+    """
+    def __init__(self, name, params, root = None):
+        self.name   = name
+        self.params = params
+        self.root   = root or default_root()
+        self.key  = run_key(params)
+        self.file_addr = os.path.join(self.root, f"{name}-{self.key}")
+        self.code = code_version()
+        self.manifest = load_manifest(self.file_addr)
+        self.cached = (self.manifest != None and self.manifest.get("status") == "complete"
+                       and self.manifest.get("code", {}).get("sources") == self.code["sources"])
+
+    def start(self, resume = False):
+        os.makedirs(self.file_addr, exist_ok=True)
+        acquire(self.file_addr)
+        if not resume:
+            empty_directory(self.file_addr)
+        self.start_time = time.time()
+        self.manifest = {
+            "version": VERSION,
+            "name":    self.name,
+            "key":     self.key,
+            "params":  self.params,
+            "code":    self.code,
+            "command": sys.argv,
+            "host":    platform.node(),
+            "status":  "running",
+            "resumed": resume,
+            "started": now(),
+        }
+        save_manifest(self.file_addr, self.manifest)
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.manifest["status"]   = "complete" if exc_type == None else "failed"
+        self.manifest["finished"] = now()
+        self.manifest["elapsed"]  = time.time() - self.start_time
+        if exc_type != None:
+            self.manifest["error"] = repr(exc)
+        files = sorted(name for name in os.listdir(self.file_addr) if name not in (MANIFEST, LOCK))
+        self.manifest["files"] = {name: os.path.getsize(os.path.join(self.file_addr, name)) for name in files}
+        save_manifest(self.file_addr, self.manifest)
+        release(self.file_addr)
+
+def runs(root):
+    """ (directory, manifest) of every run under root, oldest first. """
+    found = []
+    for file_addr in glob.glob(os.path.join(root, "*")):
+        manifest = load_manifest(file_addr)
+        if manifest != None:
+            found.append((file_addr, manifest))
+    return sorted(found, key=lambda run: run[1].get("started", ""))
+
+if __name__ == "__main__":
+    # Create the parser
+    parser = argparse.ArgumentParser(description="List the part a / part b runs under an output root")
+
+    # Add arguments
+    parser.add_argument("--output", type=str, default=None, help="Output root, default $LAB_1_OUTPUT or log/")
+
+    # Parse the arguments
+    args = parser.parse_args()
+
+    root = args.output or default_root()
+    print(f"{'run':<60}{'status':<10}{'started':<21}{'elapsed (s)':>12}  code")
+    for file_addr, manifest in runs(root):
+        elapsed = f"{manifest['elapsed']:>12.1f}" if "elapsed" in manifest else f"{'':>12}"
+        print(f"{os.path.basename(file_addr):<60}{manifest.get('status', ''):<10}{manifest.get('started', ''):<21}"
+              f"{elapsed}  {manifest.get('code', {}).get('commit')}")
@@ -0,0 +1,185 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_packets.py
+Description: Per-packet results of a run (index, arrival, departure, spent,
+             size, number in system found on arrival, class).
+             binary - packets.bin, written chunk by chunk during the run. Each
+                      chunk holds its columns as integers, zlib compressed:
+                      arrival in 0.01 us and departure in 0.001 us ticks,
+                      both delta coded, in the narrowest integer type. This
+                      is the precision of packets.txt, and spent is
+                      departure - arrival.
+             text   - packets.txt, one "Index: ... Spent time: ..." line per packet.
+             read() / chunks() give the columns as numpy arrays for
+             post-processing, and to_text() turns packets.bin into the
+             packets.txt lines:
+             python lab_1_packets.py packets.bin --text packets.txt
+             Binary layout: one 16 Bytes header (magic, version), then per
+             chunk a (count, Bytes) header and the compressed columns.
+Dependencies: numpy, argparse, io, os, zlib
+"""
+
+import numpy as np
+import argparse
+import io
+import os
+import zlib
+
+MAGIC   = b"L1_PKTAB"
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("reserved", "<u4")])
+CHUNK_DTYPE  = np.dtype([("count", "<u8"), ("bytes", "<u8")])
+
+FORMATS = ["binary", "text", "off"]
+FILE_NAMES = {"binary": "packets.bin", "text": "packets.txt"}
+COLUMNS = ["index", "arrival", "departure", "spent", "size", "num_in_sys", "cls"]
+TEXT_FORMAT = "Index: %-6d Packet size: %-6d Arrival time: %-12.2f Departure time: %-12.3f Spent time: %-12.3f"
+
+def smallest_int(values):
+    """ values in the narrowest signed integer type that holds them. """
+    values = np.asarray(values)
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if len(values) == 0 or (values.min() >= info.min and values.max() <= info.max):
+            return values.astype(dtype)
+    return values.astype(np.int64)
+
+def encode(table, start, end):
+    """ Packets start .. end - 1 of a Packet_table as one uncompressed chunk payload. """
+    arrival   = np.rint(table.arrival[start:end] * 100).astype(np.int64)
+    departure = np.rint(table.departure[start:end] * 1000).astype(np.int64)
+    columns = [np.diff(table.index[start:end], prepend=0), np.diff(arrival, prepend=0),
+               np.diff(departure, prepend=0), table.size[start:end], table.num_in_sys[start:end], table.cls[start:end]]
+    buffer = io.BytesIO()
+    for column in columns:
+        np.lib.format.write_array(buffer, smallest_int(column), allow_pickle=False)
+    return buffer.getvalue()
+
+def decode(payload):
+    buffer = io.BytesIO(payload)
+    index, arrival, departure, size, num_in_sys, cls = [np.lib.format.read_array(buffer) for i in range(6)]
+    index     = np.cumsum(index, dtype=np.int64)
+    arrival   = np.cumsum(arrival, dtype=np.int64)
+    departure = np.cumsum(departure, dtype=np.int64)
+    # A dropped packet has no departure, and spends no time in the system
+    spent = np.where(departure == 0, 0, departure - arrival * 10) / 1000
+    return {"index": index, "arrival": arrival / 100, "departure": departure / 1000, "spent": spent,
+            "size": size.astype(np.uint32), "num_in_sys": num_in_sys.astype(np.int32), "cls": cls.astype(np.uint8)}
+
+class Packet_writer:
+    """
+    packets.bin, Packet_table.save(writer) adds the table as chunks of up to
+    chunk_size packets. append continues the file of a resumed run.
+    """
+    def __init__(self, file_name, append = False, chunk_size = 1000000, level = 1):
+        self.name  = file_name
+        self.chunk_size = chunk_size
+        self.level = level
+        if append:
+            self.file = open(file_name, 'ab')
+        else:
+            self.file = open(file_name, 'wb')
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header["magic"] = MAGIC
+            header["version"] = VERSION
+            self.file.write(header.tobytes())
+
+    def write(self, table):
+        for start in range(0, len(table), self.chunk_size):
+            end = min(start + self.chunk_size, len(table))
+            payload = zlib.compress(encode(table, start, end), self.level)
+            self.file.write(np.array([(end - start, len(payload))], dtype=CHUNK_DTYPE).tobytes())
+            self.file.write(payload)
+
+    def flush(self):
+        self.file.flush()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_file(file_addr, packet_format = "binary", append = False):
+    """ The packet file of a run in file_addr, None for "off". Packet_table.save writes to either kind. """
+    match packet_format:
+        case "binary":
+            return Packet_writer(f"{file_addr}/{FILE_NAMES['binary']}", append)
+        case "text":
+            return open(f"{file_addr}/{FILE_NAMES['text']}", 'a' if append else 'w')
+        case "off":
+            return None
+        case _:
+            raise ValueError(f"Unknown packet format: {packet_format}")
+
+def header_size(packet_format):
+    """ Bytes before the first packet, skipped when files are joined. """
+    return HEADER_DTYPE.itemsize if packet_format == "binary" else 0
+
+def chunks(file_name):
+    """ Yield the columns of packets.bin chunk by chunk, as a dict of arrays. """
+    with open(file_name, 'rb') as file:
+        header = np.frombuffer(file.read(HEADER_DTYPE.itemsize), dtype=HEADER_DTYPE)
+        if len(header) == 0 or header[0]["magic"] != MAGIC:
+            raise ValueError(f"{file_name} is not a lab 1 packet file")
+        if header[0]["version"] != VERSION:
+            raise ValueError(f"{file_name}: unsupported packet file version {header[0]['version']}")
+        while True:
+            data = file.read(CHUNK_DTYPE.itemsize)
+            if not data:
+                break
+            chunk = np.frombuffer(data, dtype=CHUNK_DTYPE)
+            payload = file.read(int(chunk[0]["bytes"])) if len(chunk) else b""
+            if len(chunk) == 0 or len(payload) < chunk[0]["bytes"]:
+                raise ValueError(f"{file_name} ends in the middle of a chunk")
+            yield decode(zlib.decompress(payload))
+
+def read(file_name, columns = None):
+    """ The whole packets.bin as a dict of arrays, e.g. pandas.DataFrame(read("packets.bin")). """
+    columns = columns or COLUMNS
+    blocks = {column: [] for column in columns}
+    for chunk in chunks(file_name):
+        for column in columns:
+            blocks[column].append(chunk[column])
+    return {column: np.concatenate(blocks[column]) if blocks[column] else np.zeros(0) for column in columns}
+
+def to_text(file_name, text_file):
+    """ Write packets.bin as the lines of packets.txt, returns the number of packets. """
+    count = 0
+    with open(text_file, 'w') as file:
+        for chunk in chunks(file_name):
+            columns = np.column_stack((chunk["index"], chunk["size"], chunk["arrival"], chunk["departure"], chunk["spent"]))
+            np.savetxt(file, columns, fmt=TEXT_FORMAT)
+            count += len(columns)
+    return count
+
+if __name__ == "__main__":
+    # Create the parser
+    parser = argparse.ArgumentParser(description="Decode packets.bin of a lab 1 run")
+
+    # Add arguments
+    parser.add_argument("packet_file", type=str, help="packets.bin")
+    parser.add_argument("--text"     , type=str, default=None, help="Write the packets.txt lines to this file")
+
+    # Parse the arguments
+    args = parser.parse_args()
+
+    if args.text:
+        count = to_text(args.packet_file, args.text)
+        print(f"{args.packet_file} -> {args.text}: {count} packets")
+    else:
+        packets = read(args.packet_file)
+        served = packets["departure"] > 0
+        print(f"{args.packet_file}: {len(packets['index'])} packets, {int(served.sum())} served, "
+              f"{os.path.getsize(args.packet_file)} Bytes")
+        if served.any():
+            print(f"mean time in system T: {packets['spent'][served].mean():.3f} us, "
+                  f"mean number found on arrival N: {packets['num_in_sys'][packets['num_in_sys'] >= 0].mean():.3f}")
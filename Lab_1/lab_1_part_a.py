@@ -1,87 +1,169 @@
 """
 Code Author: Peng, Caikun
 Create Date: 02/06/2024 
-Last Edit Date: 05/06/2024
+Last Edit Date: 18/10/2026
 File Name: lab_1_part_a.py
 Description: Main program of lab 1 - part a
-Dependencies: lab_1_functions, numpy, argparse, time, os, shutil, tqdm
+Dependencies: lab_1_functions, lab_1_engine, lab_1_stats, lab_1_eventlog, lab_1_validate, lab_1_discipline, 
+              lab_1_checkpoint, lab_1_profile, lab_1_packets, lab_1_output, numpy, argparse, time
 """
 
 import lab_1_functions as f
+import lab_1_engine as e
+import lab_1_stats as stats
+import lab_1_eventlog as eventlog
+import lab_1_validate as validate
+import lab_1_discipline as disc
+import lab_1_checkpoint as ckpt
+import lab_1_profile as profile
+import lab_1_packets as pktio
+import lab_1_output as output
 import numpy as np
 import argparse
 import time
-import os
-import shutil
-from tqdm import tqdm
 
-def recreate_directory(directory_path):
-    if os.path.exists(directory_path):
-        shutil.rmtree(directory_path)
+def simulate(_lambda, npkts, fifo_len, engine="event", seed=None, file_addr=".", save_packets=True,
+             batch_size=0, precision=0, log_mode="text", discipline="fifo", classes=None, weights=None,
+             chunk_size=1000000, checkpoint_every=0, resume=False, packet_format="binary"):
+    """
+    One run of part a, logs go to file_addr. Returns the Server.summary results,
+    with the comparison against M/M/1 or M/M/1/K under "validation".
+    batch_size > 0 adds a batch means steady-state estimate, precision > 0 
+    stops the run once it is reached. log_mode is the per-event log, text, 
+    binary or off, always off with the analytic engine. classes are the 
+    probabilities of the packet classes, scheduled by discipline 
+    (lab_1_discipline) with weights.
+    checkpoint_every > 0 runs chunk by chunk and snapshots the run every that
+    many chunks, resume carries on from the last snapshot in file_addr.
+    packet_format is the packet file with save_packets, binary packets.bin
+    or text packets.txt (lab_1_packets). The event and analytic engines run
+    chunk_size packets at a time and write each chunk during the run, the
+    tick engine writes the whole table at the end.
+    """
+    if engine == "analytic":
+        # No per-event records to log
+        log_mode = "off"
+    params = {"lambda": _lambda, "npkts": npkts, "queue": fifo_len, "engine": engine, "seed": seed,
+              "packet_format": packet_format if save_packets else "off", "batch": batch_size, "precision": precision,
+              "log": log_mode, "discipline": discipline, "classes": classes, "weights": weights, "chunk": chunk_size}
+    state = None
+    if resume:
+        state = ckpt.load(file_addr, params)
+    log = f.log_init(file_addr, log_mode, append=state != None)
 
-    os.makedirs(directory_path)
-
-def main(_lambda, npkts, fifo_len):
+    # Initial sim parameter
+    nclasses = len(classes) if classes else 1
+    source  = f.Source_part_a(_lambda, npkts, seed=seed, classes=classes)
+    fifo    = f.Queue(fifo_len, discipline, nclasses, weights)
+    server  = f.Server(npkts, classes=nclasses)
+    monitor = None
+    if batch_size:
+        monitor = stats.Steady_state(batch_size, precision)
+    pkt_file = None
+    if save_packets:
+        pkt_file = pktio.open_file(file_addr, packet_format, append=state != None)
+
+    # Run simulation
+    checkpoint = None
+    if checkpoint_every or state != None:
+        # Chunk by chunk with snapshots, see lab_1_checkpoint
+        checkpoint = ckpt.Checkpoint(file_addr, checkpoint_every, params, source, fifo, server, monitor, log, pkt_file)
+        engine_state = None
+        if state != None:
+            engine_state = checkpoint.restore(state)
+        # Chunks are generated, simulated and written in turn, all in the simulation phase
+        with profile.phase("simulation"):
+            match engine:
+                case "analytic":
+                    e.run_analytic_chunks(source.generate_chunks(chunk_size), fifo, server, pkt_file, monitor, checkpoint, engine_state)
+                case "event":
+                    e.run_event_chunks(source.generate_chunks(chunk_size), fifo, server, pkt_file, monitor, checkpoint, engine_state)
+                case _:
+                    raise ValueError(f"{engine} engine does not support checkpoints")
+            log.close()
+        with profile.phase("summary"):
+            result = server.summary(file_addr, f"lambda = {_lambda}", fifo)
+    elif engine != "tick":
+        # Stream the source chunk by chunk, memory is bounded by the chunk size and each chunk
+        # is written to the packet file as soon as all its packets have left
+        with profile.phase("simulation"):
+            if engine == "analytic":
+                e.run_analytic_chunks(source.generate_chunks(chunk_size), fifo, server, pkt_file, monitor)
+            else:
+                e.run_event_chunks(source.generate_chunks(chunk_size), fifo, server, pkt_file, monitor)
+            log.close()
+        with profile.phase("summary"):
+            result = server.summary(file_addr, f"lambda = {_lambda}", fifo)
+    else:
+        # The tick engine runs on the whole table, written to the packet file at the end
+        with profile.phase("generation"):
+            packets = source.generate()
+        with profile.phase("simulation"):
+            e.run(engine, packets, fifo, server, clk_step=0.01, monitor=monitor) # us [packet arrival time] = 0.01 us
+            log.close()
+        with profile.phase("summary"):
+            result = server.summary(file_addr, f"lambda = {_lambda}", fifo)
+        with profile.phase("packets"):
+            if pkt_file != None:
+                packets.save(pkt_file)
+    if pkt_file != None:
+        pkt_file.close()
+
+    mu = server.service_rate / source.size
+    with profile.phase("validation"):
+        result["validation"] = validate.validate(result, _lambda, mu, fifo_len, file_addr, f"lambda = {_lambda}")
+    if monitor != None:
+        result["steady_state"] = monitor.summary(file_addr, f"lambda = {_lambda}")
+    if checkpoint != None:
+        checkpoint.finish()
+    return result
+
+def main(_lambda, npkts, fifo_len, engine="event", seed=None, batch_size=0, precision=0, log_mode="text",
+         discipline="fifo", classes=None, weights=None, chunk_size=1000000, checkpoint_every=0, resume=False,
+         profile_modes=None, sample_ms=1.0, packet_format="binary", output_root=None, rerun=False):
+    """
+    profile_modes: lab_1_profile.MODES to turn on, profile.log goes next to sum.log.
+    The run goes to its own directory under output_root (see lab_1_output). A
+    complete run with the same parameters and seed is not simulated again
+    unless rerun. Without a seed one is drawn, so every such run gets a
+    directory of its own, and printed: --seed with it finds the run again.
+    """
     print("Start Running")
     start_time = time.time()
+    if engine == "analytic" and log_mode != "off":
+        print(f"The analytic engine writes no per-event log, --log {log_mode} is ignored")
+        log_mode = "off"
+    if seed == None:
+        seed = np.random.SeedSequence().entropy
+        print(f"Seed: {seed} (--seed {seed} --resume carries on from a checkpoint of this run)")
 
     # Define log file address
     if fifo_len == 0:
-        file_addr = f"E:/UNSW/24_T2/TELE4642/Lab/Lab_1/log/lambda_{_lambda}_npkts_{npkts}"
+        name = f"lambda_{_lambda}_npkts_{npkts}"
     else:
-        file_addr = f"E:/UNSW/24_T2/TELE4642/Lab/Lab_1/log/lambda_{_lambda}_npkts_{npkts}_Qlen_{fifo_len}"
-    recreate_directory(file_addr)
-
-    f.log_init(file_addr)
-
-    # Initial sim parameter
-    source  = f.Source_part_a(_lambda,npkts)
-    packets = source.generate()
-    fifo    = f.Queue(fifo_len)
-    server  = f.Server(npkts)
-    
-    packets_served = []
-    packet_index = 0
-    packet_end   = 0
-    service_flag = "IDLE"
-    packet_flag  = None
-
-    # Time setting
-    clk = 0
-
-    # Progress bar
-    packet_insert_progress = tqdm(range(npkts), desc="Packets insert progress", position=0, leave=True)
-    packet_served_progress = tqdm(range(npkts), desc="Packets served progress", position=1, leave=True)
-    # with tqdm(total=npkts) as pbar:
-    while 1:
-        f.System_clk(clk)
-        
-        # Start service
-        service_flag = server.service(fifo, service_flag, packet_flag)
-        if server.state_flag == "packet_served":
-            packet_served_progress.update(1)
-            
-        # FIFO Queue
-        if packet_index < npkts:
-            packet_current = packets[packet_index]
-            if clk >= packet_current.arrival: 
-                fifo.insert(packet_current, service_flag)
-                packet_index += 1
-                packet_insert_progress.update(1)
-        else:
-            packet_current = None    
-            packet_end = 1
-            if len(fifo.queue) == 0: 
-                packet_flag = "to_END"
-
-        if server.service_end:
-            server.summary(file_addr, f"lambda = {_lambda}", fifo, packets)
-            break
-
-        clk += 0.01 # us [packet arrival time] = 0.01 us
-
-    pkt_file = f"{file_addr}/packets.txt"
-    np.savetxt(pkt_file, packets, fmt='%s', delimiter='\t')
+        name = f"lambda_{_lambda}_npkts_{npkts}_Qlen_{fifo_len}"
+    params = {"lambda": _lambda, "npkts": npkts, "queue": fifo_len, "engine": engine, "seed": seed,
+              "batch": batch_size, "precision": precision, "log": log_mode, "discipline": discipline,
+              "classes": classes, "weights": weights, "chunk": chunk_size, "packet_format": packet_format}
+    run = output.Run(name, params, output_root)
+    file_addr = run.file_addr
+    if run.cached and not rerun:
+        print(f"Same run already done in {file_addr}, not simulated again (--rerun to force)")
+        return
+    if resume and not ckpt.exists(file_addr):
+        raise ValueError(f"--resume: no checkpoint in {file_addr}, nothing to resume (give the --seed of the run)")
+    if resume:
+        print(f"Resume from {ckpt.file_name(file_addr)}")
+
+    with run.start(resume):
+        if profile_modes:
+            profile.enable(profile_modes, sample_ms)
+        simulate(_lambda, npkts, fifo_len, engine, seed, file_addr, packet_format != "off", batch_size=batch_size,
+                 precision=precision, log_mode=log_mode, discipline=discipline, classes=classes, weights=weights,
+                 chunk_size=chunk_size, checkpoint_every=checkpoint_every, resume=resume, packet_format=packet_format)
+        if profile_modes:
+            run.manifest["profile"] = profile.report(file_addr, f"lambda = {_lambda}")
+    print(f"Results in {file_addr}")
     
     end_time = time.time()
     elapsed_time = end_time - start_time
@@ -95,6 +177,22 @@ if __name__ == "__main__":
     parser.add_argument("--_lambda", type=float, default=1.0    , help="lambda"      )
     parser.add_argument("--npkts"  , type=int  , default=1000000, help="npkts"       )
     parser.add_argument("--queue"  , type=int  , default=0      , help="Queue length")
+    parser.add_argument("--engine" , type=str  , default="event", choices=e.ENGINES, help="Simulation engine")
+    parser.add_argument("--seed"   , type=int  , default=None   , help="Random seed")
+    parser.add_argument("--batch"  , type=int  , default=0      , help="Batch size of the steady-state batch means estimate, 0 is off")
+    parser.add_argument("--precision", type=float, default=0    , help="Stop once the relative 95%% half-width of N and T is reached (needs --batch)")
+    parser.add_argument("--log"    , type=str  , default="text" , choices=eventlog.MODES, help="Per-event log: text sim.log, binary sim.trace or off")
+    parser.add_argument("--discipline", type=str, default="fifo", choices=disc.DISCIPLINES, help="Queue scheduling discipline")
+    parser.add_argument("--classes", type=float, nargs="+", default=None, help="Probability of each packet class, e.g. 0.2 0.8")
+    parser.add_argument("--weights", type=float, nargs="+", default=None, help="DRR quantum (Bytes) or WFQ weight of each class")
+    parser.add_argument("--chunk"  , type=int  , default=1000000, help="Packets per chunk of the event and analytic engines")
+    parser.add_argument("--checkpoint", type=int, default=0     , help="Snapshot the run every this many chunks, 0 is off")
+    parser.add_argument("--resume" , action="store_true", help="Carry on from the last snapshot of the same run")
+    parser.add_argument("--profile", type=str  , nargs="+", default=None, choices=profile.MODES, help="Instrument the run, writes profile.log")
+    parser.add_argument("--sample_ms", type=float, default=1.0  , help="Stack sampling interval of --profile sample, ms")
+    parser.add_argument("--packets", type=str  , default="binary", choices=pktio.FORMATS, help="Per-packet results: binary packets.bin, text packets.txt or off")
+    parser.add_argument("--output" , type=str  , default=None   , help="Output root, default $LAB_1_OUTPUT or log/ next to this file")
+    parser.add_argument("--rerun"  , action="store_true", help="Simulate again even if the same run is already done")
 
     # Parse the arguments
     args = parser.parse_args()
@@ -103,7 +201,35 @@ if __name__ == "__main__":
     _lambda = args._lambda
     npkts = args.npkts
     fifo_len = args.queue
+    engine = args.engine
+    seed = args.seed
+    batch_size = args.batch
+    precision = args.precision
+    log_mode = args.log
+    discipline = args.discipline
+    classes = args.classes
+    weights = args.weights
+    chunk_size = args.chunk
+    checkpoint_every = args.checkpoint
+    resume = args.resume
+    if engine == "analytic" and fifo_len != 0:
+        parser.error("--engine analytic only supports an infinite buffer (--queue 0)")
+    if engine == "analytic" and discipline != "fifo":
+        parser.error("--engine analytic only supports --discipline fifo")
+    if classes and abs(sum(classes) - 1) > 1e-9:
+        parser.error("--classes must sum to 1")
+    if weights and len(weights) != len(classes or [1]):
+        parser.error("--weights needs one value per class")
+    if weights and min(weights) <= 0:
+        parser.error("--weights must all be > 0")
+    if (checkpoint_every or resume) and engine == "tick":
+        parser.error("--checkpoint and --resume need the event or analytic engine")
+    if (checkpoint_every or resume) and log_mode == "text" and engine != "analytic":
+        parser.error("--checkpoint and --resume need --log binary or off")
+    if batch_size and engine == "tick":
+        parser.error("--batch needs the event or analytic engine")
 
     print(f"lambda = {_lambda}")
 
-    main(_lambda, npkts, fifo_len)
\ No newline at end of file
+    main(_lambda, npkts, fifo_len, engine, seed, batch_size, precision, log_mode, discipline, classes, weights,
+         chunk_size, checkpoint_every, resume, args.profile, args.sample_ms, args.packets, args.output, args.rerun)
\ No newline at end of file
@@ -1,89 +1,169 @@
 """
 Code Author: Peng, Caikun
 Create Date: 03/06/2024 
-Last Edit Date: 05/06/2024
+Last Edit Date: 18/10/2026
 File Name: lab_1_part_b.py
 Description: Main program of lab 1 - part b
-Dependencies: lab_1_functions, argparse, numpy, time, os, shutil, tqdm
+Dependencies: lab_1_functions, lab_1_engine, lab_1_stats, lab_1_eventlog, lab_1_lrd, lab_1_checkpoint, 
+              lab_1_shard, lab_1_profile, lab_1_packets, lab_1_output, numpy, argparse, time
 """
 
 import lab_1_functions as f
+import lab_1_engine as e
+import lab_1_stats as stats
+import lab_1_eventlog as eventlog
+import lab_1_lrd as lrd
+import lab_1_checkpoint as ckpt
+import lab_1_shard as shard
+import lab_1_profile as profile
+import lab_1_packets as pktio
+import lab_1_output as output
 import numpy as np
 import argparse
 import time
-import os
-import shutil
-from tqdm import tqdm
 
-def recreate_directory(directory_path):
-    if os.path.exists(directory_path):
-        shutil.rmtree(directory_path)
-
-    os.makedirs(directory_path)
-
-def main(file_name, packet_len):
+def main(file_name, packet_len, engine="event", chunk_size=0, binary=False, batch_size=0, precision=0, log_mode="text",
+         synthetic=None, hurst=0.8, rate=0.8, seed=None, checkpoint_every=0, resume=False,
+         workers=0, segment_size=1000000, profile_modes=None, sample_ms=1.0, packet_format="binary",
+         output_root=None, rerun=False):
+    """
+    synthetic (fgn or onoff) replaces the trace file with a lab_1_lrd source of packet_len packets.
+    checkpoint_every > 0 snapshots the chunked run every that many chunks, resume carries on
+    from the last snapshot (see lab_1_checkpoint).
+    workers > 0 cuts the trace into segments of about segment_size packets at idle
+    periods and simulates them on that many processes (see lab_1_shard).
+    profile_modes: lab_1_profile.MODES to turn on, profile.log goes next to sum.log.
+    packet_format: per-packet results, binary packets.bin, text packets.txt or off (lab_1_packets).
+    log_mode is always off with the analytic engine, it has no per-event records.
+    The event and analytic engines run chunk_size (0 is 1000000) packets at a time and
+    write each chunk during the run, the tick engine writes the whole table at the end.
+    The run goes to its own directory under output_root (see lab_1_output). A complete
+    run with the same parameters and trace is not simulated again unless rerun.
+    A synthetic source without a seed gets a drawn one, printed so --seed finds
+    the run again.
+    """
     print("Start Running")
+    chunk_size = chunk_size or 1000000
+    if engine == "analytic" and log_mode != "off":
+        print(f"The analytic engine writes no per-event log, --log {log_mode} is ignored")
+        log_mode = "off"
+    if synthetic and seed == None:
+        seed = np.random.SeedSequence().entropy
+        print(f"Seed: {seed} (--seed {seed} --resume carries on from a checkpoint of this run)")
+    if synthetic:
+        source = f.Source_lrd(synthetic, hurst, rate, packet_len or 1000000, seed)
+        file_name = f"{synthetic}_H{hurst}_rate_{rate}"
+    else:
+        source = f.Source_part_b(file_name, binary)
     start_time = time.time()
 
     # Define log file address
     if packet_len:
-        file_addr = f"E:/UNSW/24_T2/TELE4642/Lab/Lab_1/log/sim_{file_name}_first_{packet_len}_Lines"
+        name = f"sim_{file_name}_first_{packet_len}_Lines"
     else:
-        file_addr = f"E:/UNSW/24_T2/TELE4642/Lab/Lab_1/log/sim_{file_name}"
-    recreate_directory(file_addr)
-
-    f.log_init(file_addr)
-
-    # Initial sim parameter
-    source  = f.Source_part_b(file_name)
-    packets = source.generate(packet_len)
-    npkts   = len(packets)
-    fifo    = f.Queue()
-    server  = f.Server(npkts)
-    
-    packets_served = []
-    packet_index = 0
-    packet_end   = 0
-    service_flag = "IDLE"
-    packet_flag  = None
-
-    # Time setting
-    clk = 0
-
-    # Progress bar
-    packet_insert_progress = tqdm(range(npkts), desc="Packets insert progress", position=0, leave=True)
-    packet_served_progress = tqdm(range(npkts), desc="Packets served progress", position=1, leave=True)
-    # with tqdm(total=npkts) as pbar:
-    while 1:
-        f.System_clk(clk)
-        
-        # Start service
-        service_flag = server.service(fifo, service_flag, packet_flag)
-        if server.state_flag == "packet_served":
-            packet_served_progress.update(1)
-            
-        # FIFO Queue
-        if packet_index < npkts:
-            packet_current = packets[packet_index]
-            if clk >= packet_current.arrival: 
-                fifo.insert(packet_current, service_flag)
-                packet_index += 1
-                packet_insert_progress.update(1)
-
+        name = f"sim_{file_name}"
+    params = {"trace": file_name, "packet_length": packet_len, "engine": engine, "chunk": chunk_size, "binary": binary,
+              "batch": batch_size, "precision": precision, "log": log_mode, "synthetic": synthetic,
+              "hurst": hurst, "rate": rate, "seed": seed, "packet_format": packet_format}
+    if not synthetic:
+        # A trace changed since a run is another run
+        params["trace_file"] = output.file_identity(source.file_name)
+    run = output.Run(name, params, output_root)
+    file_addr = run.file_addr
+    if run.cached and not rerun:
+        print(f"Same run already done in {file_addr}, not simulated again (--rerun to force)")
+        return
+    if resume and not ckpt.exists(file_addr):
+        raise ValueError(f"--resume: no checkpoint in {file_addr}, nothing to resume (give the --seed of the run)")
+
+    with run.start(resume):
+        state = None
+        if resume:
+            print(f"Resume from {ckpt.file_name(file_addr)}")
+            state = ckpt.load(file_addr, params)
+
+        if profile_modes:
+            profile.enable(profile_modes, sample_ms)
+        log = f.log_init(file_addr, log_mode, append=state != None)
+
+        # Initial sim parameter
+        fifo    = f.Queue()
+        pkt_file = None
+        if not workers:
+            pkt_file = pktio.open_file(file_addr, packet_format, append=state != None)
+        monitor = None
+        if batch_size:
+            monitor = stats.Steady_state(batch_size, precision)
+
+        checkpoint = None
+        if workers:
+            # Segments on worker processes, their logs are merged into this run's
+            log.close()
+            server = f.Server(packet_len)
+            with profile.phase("simulation"):
+                shard.run(file_name, binary, packet_len, engine, file_addr, fifo, server, workers, segment_size,
+                          chunk_size, log_mode, packet_format)
+            with profile.phase("summary"):
+                server.summary(file_addr, file_name, fifo)
+        elif checkpoint_every or state != None:
+            # Chunk by chunk with snapshots
+            server = f.Server(packet_len)
+            checkpoint = ckpt.Checkpoint(file_addr, checkpoint_every, params, source, fifo, server, monitor, log, pkt_file)
+            engine_state = None
+            if state != None:
+                engine_state = checkpoint.restore(state)
+            chunks = source.generate_chunks(packet_len, chunk_size)
+            # Chunks are read, simulated and written in turn, all in the simulation phase
+            with profile.phase("simulation"):
+                match engine:
+                    case "analytic":
+                        e.run_analytic_chunks(chunks, fifo, server, pkt_file, monitor, checkpoint, engine_state)
+                    case "event":
+                        e.run_event_chunks(chunks, fifo, server, pkt_file, monitor, checkpoint, engine_state)
+                    case _:
+                        raise ValueError(f"{engine} engine does not support checkpoints")
+                log.close()
+            with profile.phase("summary"):
+                server.summary(file_addr, file_name, fifo)
+        elif engine != "tick":
+            # Stream the trace chunk by chunk, memory is bounded by the chunk size and each chunk
+            # is written to the packet file as soon as all its packets have left
+            server = f.Server(packet_len)
+            chunks = source.generate_chunks(packet_len, chunk_size)
+            with profile.phase("simulation"):
+                if engine == "analytic":
+                    e.run_analytic_chunks(chunks, fifo, server, pkt_file, monitor)
+                else:
+                    e.run_event_chunks(chunks, fifo, server, pkt_file, monitor)
+                log.close()
+            with profile.phase("summary"):
+                server.summary(file_addr, file_name, fifo)
         else:
-            packet_current = None    
-            packet_end = 1
-            if len(fifo.queue) == 0: 
-                packet_flag = "to_END"
-
-        if server.service_end:
-            server.summary(file_addr, file_name, fifo, packets)
-            break
-
-        clk += 0.005
-
-    pkt_file = f"{file_addr}/packets.txt"
-    np.savetxt(pkt_file, packets, fmt='%s', delimiter='\t')
+            # The tick engine runs on the whole table, written to the packet file at the end
+            with profile.phase("generation"):
+                packets = source.generate(packet_len)
+            npkts   = len(packets)
+            server  = f.Server(npkts)
+
+            # Run simulation
+            with profile.phase("simulation"):
+                e.run(engine, packets, fifo, server, clk_step=0.005, monitor=monitor)
+                log.close()
+            with profile.phase("summary"):
+                server.summary(file_addr, file_name, fifo)
+            with profile.phase("packets"):
+                if pkt_file != None:
+                    packets.save(pkt_file)
+        if pkt_file != None:
+            pkt_file.close()
+
+        if monitor != None:
+            monitor.summary(file_addr, file_name)
+        if checkpoint != None:
+            checkpoint.finish()
+        if profile_modes:
+            run.manifest["profile"] = profile.report(file_addr, file_name)
+    print(f"Results in {file_addr}")
     
     end_time = time.time()
     elapsed_time = end_time - start_time
@@ -96,6 +176,25 @@ if __name__ == "__main__":
     # Add arguments
     parser.add_argument("--traceNumber", type=str, default='trace1', help="traceNumber")
     parser.add_argument("--packetLength",type=int, default=0, help="packetLength")
+    parser.add_argument("--engine",     type=str, default="event", choices=e.ENGINES, help="Simulation engine")
+    parser.add_argument("--chunk",      type=int, default=0, help="Stream the trace in chunks of this many packets (event and analytic engines), 0 is 1000000")
+    parser.add_argument("--binary",     action="store_true", help="Read the binary trace made by lab_1_trace.py")
+    parser.add_argument("--batch",      type=int, default=0, help="Batch size of the steady-state batch means estimate, 0 is off")
+    parser.add_argument("--precision",  type=float, default=0, help="Stop once the relative 95%% half-width of N and T is reached (needs --batch)")
+    parser.add_argument("--log",        type=str, default="text", choices=eventlog.MODES, help="Per-event log: text sim.log, binary sim.trace or off")
+    parser.add_argument("--synthetic",  type=str, default=None, choices=lrd.MODELS, help="Synthetic LRD source instead of a trace file")
+    parser.add_argument("--hurst",      type=float, default=0.8, help="Hurst parameter of the synthetic source, 0.5 < H < 1")
+    parser.add_argument("--rate",       type=float, default=0.8, help="Mean rate of the synthetic source, packets/us")
+    parser.add_argument("--seed",       type=int, default=None, help="Random seed of the synthetic source")
+    parser.add_argument("--checkpoint", type=int, default=0, help="Snapshot the run every this many chunks (of --chunk packets), 0 is off")
+    parser.add_argument("--resume",     action="store_true", help="Carry on from the last snapshot of the same run")
+    parser.add_argument("--workers",    type=int, default=0, help="Simulate segments of the trace on this many processes, 0 is off")
+    parser.add_argument("--segment",    type=int, default=1000000, help="Packets per segment with --workers, segments end at idle periods")
+    parser.add_argument("--profile",    type=str, nargs="+", default=None, choices=profile.MODES, help="Instrument the run, writes profile.log")
+    parser.add_argument("--sample_ms",  type=float, default=1.0, help="Stack sampling interval of --profile sample, ms")
+    parser.add_argument("--packets",    type=str, default="binary", choices=pktio.FORMATS, help="Per-packet results: binary packets.bin, text packets.txt or off")
+    parser.add_argument("--output",     type=str, default=None, help="Output root, default $LAB_1_OUTPUT or log/ next to this file")
+    parser.add_argument("--rerun",      action="store_true", help="Simulate again even if the same run is already done")
 
     # Parse the arguments
     args = parser.parse_args()
@@ -104,10 +203,34 @@ if __name__ == "__main__":
     # Access the arguments
     file_name = args.traceNumber
     packet_len = args.packetLength
-
-    print(f"Trace Number: {file_name}")
+    engine = args.engine
+    chunk_size = args.chunk
+    binary = args.binary
+    batch_size = args.batch
+    precision = args.precision
+    log_mode = args.log
+    synthetic = args.synthetic
+    if synthetic and not 0.5 < args.hurst < 1:
+        parser.error("--hurst must be in (0.5, 1)")
+    if batch_size and engine == "tick":
+        parser.error("--batch needs the event or analytic engine")
+    if (args.checkpoint or args.resume) and engine == "tick":
+        parser.error("--checkpoint and --resume need the event or analytic engine")
+    if (args.checkpoint or args.resume) and log_mode == "text" and engine != "analytic":
+        parser.error("--checkpoint and --resume need --log binary or off")
+    if args.workers and (engine not in shard.ENGINES or synthetic or (log_mode == "text" and engine != "analytic")):
+        parser.error("--workers needs the event or analytic engine, a trace file and --log binary or off")
+    if args.workers and (batch_size or args.checkpoint or args.resume):
+        parser.error("--workers can not be used with --batch, --checkpoint or --resume")
+
+    if synthetic:
+        print(f"Synthetic source: {synthetic}, H = {args.hurst}, rate = {args.rate} packets/us")
+    else:
+        print(f"Trace Number: {file_name}")
     if packet_len:
         print(f"Packet Length: {packet_len}")
 
     # Call main function with file_name
-    main(file_name, packet_len)
+    main(file_name, packet_len, engine, chunk_size, binary, batch_size, precision, log_mode,
+         synthetic, args.hurst, args.rate, args.seed, args.checkpoint, args.resume,
+         args.workers, args.segment, args.profile, args.sample_ms, args.packets, args.output, args.rerun)
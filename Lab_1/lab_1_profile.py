@@ -0,0 +1,222 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_profile.py
+Description: Opt-in instrumentation of a lab 1 run (--profile in part a / part b).
+             Nothing is patched until enable(), so a run without it executes
+             exactly the same code as before.
+             counters - wraps Queue, Server, Event_scheduler, lindley, the
+                        per-event logs and the tqdm progress bars to count
+                        queue operations and drops, tick engine state
+                        transitions, idle / serving / transition ticks,
+                        scheduler events, log writes and progress updates,
+                        with the time spent in log writes and progress bars
+             cprofile - cProfile of the run, written to profile.pstats
+             sample   - the main thread stack every sample_ms, written to
+                        profile.folded as "frame;frame;frame count" lines
+                        (flamegraph.pl, speedscope)
+             phase() times generation, simulation, summary, packet dump and
+             validation in every mode. report() writes profile.log.
+Dependencies: lab_1_functions, lab_1_engine, lab_1_eventlog, tqdm, cProfile, pstats, collections,
+              contextlib, functools, io, os, sys, threading, time
+"""
+
+import lab_1_functions as f
+import lab_1_engine as e
+import lab_1_eventlog as eventlog
+import tqdm
+import cProfile
+import pstats
+import collections
+import contextlib
+import functools
+import io
+import os
+import sys
+import threading
+import time
+
+MODES = ["counters", "cprofile", "sample"]
+
+# The Profiler of the run, None when profiling is off
+active = None
+
+def phase(name):
+    """ with phase("simulation"): ... adds the time to that phase, nothing when profiling is off. """
+    if active == None:
+        return contextlib.nullcontext()
+    return active.phase(name)
+
+def enable(modes, sample_ms = 1.0):
+    global active
+    if active != None:
+        active.stop()
+    active = Profiler(modes, sample_ms)
+    return active
+
+def report(file_addr, file_ind):
+    """ Stop profiling and write profile.log (and profile.pstats / profile.folded) to file_addr. """
+    global active
+    if active == None:
+        return None
+    profiler = active
+    active = None
+    profiler.stop()
+    return profiler.report(file_addr, file_ind)
+
+class Profiler:
+    def __init__(self, modes, sample_ms = 1.0):
+        for mode in modes:
+            if mode not in MODES:
+                raise ValueError(f"Unknown profile mode: {mode}")
+        self.modes    = list(modes)
+        self.phases   = collections.Counter()
+        self.counters = collections.Counter()
+        self.seconds  = collections.Counter()
+        self.stacks   = collections.Counter()
+        self.patched  = []
+        self.profile  = None
+        self.sampler  = None
+        self.running  = True
+        if "counters" in modes:
+            self.patch_counters()
+        if "sample" in modes:
+            self.sample_interval = sample_ms / 1000
+            self.sampler = threading.Thread(target=self.sample, daemon=True)
+            self.sampler.start()
+        if "cprofile" in modes:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - start_time
+
+    def patch(self, owner, name, wrapper):
+        original = getattr(owner, name)
+        self.patched.append((owner, name, original))
+        setattr(owner, name, functools.wraps(original)(wrapper(original)))
+
+    def count(self, owner, name, key, timed = False):
+        """ Count the calls of owner.name under key, and their time with timed. """
+        counters, seconds = self.counters, self.seconds
+        def wrapper(original):
+            if not timed:
+                def counted(*args, **kwargs):
+                    counters[key] += 1
+                    return original(*args, **kwargs)
+                return counted
+            def counted(*args, **kwargs):
+                counters[key] += 1
+                start_time = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    seconds[key] += time.perf_counter() - start_time
+            return counted
+        self.patch(owner, name, wrapper)
+
+    def patch_counters(self):
+        counters = self.counters
+
+        def insert(original):
+            def counted(queue, packet, service_flag):
+                num_in_sys = original(queue, packet, service_flag)
+                counters["queue insert" if num_in_sys != None else "queue drop"] += 1
+                return num_in_sys
+            return counted
+
+        def extract(original):
+            def counted(queue):
+                packet = original(queue)
+                counters["queue extract" if packet != None else "queue extract (empty)"] += 1
+                return packet
+            return counted
+
+        def service(original):
+            def counted(server, queue, service_flag, packet_flag):
+                before = server.state_current
+                result = original(server, queue, service_flag, packet_flag)
+                after = server.state_current
+                if after != before:
+                    counters["tick transition"] += 1
+                    counters[f"transition {f.STATE_NAMES[before]} -> {f.STATE_NAMES[after]}"] += 1
+                elif server.packet == None:
+                    counters["tick idle"] += 1
+                else:
+                    counters["tick serving"] += 1
+                return result
+            return counted
+
+        self.patch(f.Queue, "insert", insert)
+        self.patch(f.Queue, "extract", extract)
+        self.patch(f.Server, "service", service)
+        self.count(f.Server, "start", "service start")
+        self.count(f.Server, "depart", "departure")
+        self.count(e.Event_scheduler, "push", "scheduler push")
+        self.count(e.Event_scheduler, "pop", "scheduler pop")
+        self.count(e, "lindley", "lindley chunk")
+        for log_class in (eventlog.Text_log, eventlog.Binary_log):
+            self.count(log_class, "arrival", "log write", timed=True)
+            self.count(log_class, "departure", "log write", timed=True)
+        self.count(tqdm.tqdm, "update", "progress update", timed=True)
+
+    def sample(self):
+        """ Sampler thread, counts the stacks of the main thread. """
+        main_id = threading.main_thread().ident
+        while self.running:
+            frame = sys._current_frames().get(main_id)
+            stack = []
+            while frame != None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+            time.sleep(self.sample_interval)
+
+    def stop(self):
+        """ Put back every patched method and stop cProfile and the sampler. """
+        if self.profile != None:
+            self.profile.disable()
+        self.running = False
+        if self.sampler != None:
+            self.sampler.join()
+        for owner, name, original in reversed(self.patched):
+            setattr(owner, name, original)
+        self.patched = []
+
+    def report(self, file_addr, file_ind):
+        lines = [
+            f"Profile of {file_ind} ({', '.join(self.modes)}):",
+            f"-------------------------------------------",
+            f"{'phase':<40}{'time (s)':>12}",
+        ]
+        for name, seconds in self.phases.items():
+            lines.append(f"{name:<40}{seconds:>12.3f}")
+        if "counters" in self.modes:
+            lines.append(f"{'counter':<40}{'count':>12}{'time (s)':>12}")
+            for name, count in sorted(self.counters.items()):
+                seconds = f"{self.seconds[name]:>12.3f}" if name in self.seconds else ""
+                lines.append(f"{name:<40}{count:>12}{seconds}")
+        if self.profile != None:
+            self.profile.dump_stats(f"{file_addr}/profile.pstats")
+            stream = io.StringIO()
+            pstats.Stats(self.profile, stream=stream).sort_stats("cumulative").print_stats(20)
+            lines.append(f"cProfile, top 20 by cumulative time (all in profile.pstats):")
+            lines.append(stream.getvalue().strip("\n"))
+        if self.sampler != None:
+            with open(f"{file_addr}/profile.folded", 'w') as file:
+                for stack, count in self.stacks.most_common():
+                    file.write(f"{stack} {count}\n")
+            lines.append(f"{sum(self.stacks.values())} stack samples every {self.sample_interval * 1000:g} ms in profile.folded")
+
+        with open(f"{file_addr}/profile.log", 'w') as file:
+            file.write("\n".join(lines) + "\n")
+        print("\n\n\n" + "\n".join(lines))
+        return {"phases": dict(self.phases), "counters": dict(self.counters), "seconds": dict(self.seconds)}
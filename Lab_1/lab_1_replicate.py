@@ -0,0 +1,124 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_replicate.py
+Description: Independent replications of lab 1 - part a. Replications run in
+             parallel, each with its own seed spawned from one SeedSequence,
+             and the mean and 95% confidence interval of N, T and P(n) are
+             reported. Stops early once N and T reach the requested relative
+             precision.
+Dependencies: lab_1_part_a, lab_1_engine, lab_1_sweep, lab_1_stats, lab_1_eventlog, lab_1_output,
+              numpy, concurrent.futures, argparse, os, time
+"""
+
+import lab_1_part_a as a
+import lab_1_engine as e
+import lab_1_sweep as sweep
+import lab_1_stats as stats
+import lab_1_eventlog as eventlog
+import lab_1_output as output
+import numpy as np
+import concurrent.futures
+import argparse
+import os
+import time
+
+def run_replication(index, _lambda, npkts, fifo_len, engine, seed, out_dir, log_mode="off"):
+    """ One replication in its own lab_1_output run directory under out_dir, seed is its SeedSequence. """
+    params = {"lambda": _lambda, "npkts": npkts, "queue": fifo_len, "engine": engine,
+              "seed": seed.entropy, "spawn_key": list(seed.spawn_key), "log": log_mode}
+    run = output.Run(f"rep_{index}", params, out_dir)
+    with run.start():
+        return a.simulate(_lambda, npkts, fifo_len, engine, seed, run.file_addr, save_packets=False, log_mode=log_mode)
+
+def summarize(results):
+    """ Mean and half-width of N, T and P(0) .. P(10), P(>10) over the replications. """
+    P = np.array([result["P"][:11] + [sum(result["P"][11:])] for result in results])
+    summary = {
+        "replications": len(results),
+        "N": stats.confidence_interval([result["N"] for result in results]),
+        "T": stats.confidence_interval([result["T"] for result in results]),
+        "P": [stats.confidence_interval(P[:, i]) for i in range(P.shape[1])],
+    }
+    return summary
+
+def converged(summary, precision):
+    return all(stats.relative_precision(*summary[metric]) <= precision for metric in ("N", "T"))
+
+def replicate(_lambda, npkts, fifo_len, engine, seed, replications, precision=0, min_replications=3,
+              workers=None, out_dir="replications", log_mode="off"):
+    """
+    Run up to replications replications, a batch of one per worker at a time.
+    With precision > 0, stop after the first batch where at least
+    min_replications are done and the 95% half-width of N and T is within
+    precision of the mean. Replications are added in seed order, so the
+    result does not depend on which worker finishes first.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count()
+    seeds = np.random.SeedSequence(seed).spawn(replications)
+    results = []
+    summary = None
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=sweep.worker_init) as pool:
+        while len(results) < replications:
+            batch = range(len(results), min(len(results) + workers, replications))
+            futures = [pool.submit(run_replication, i, _lambda, npkts, fifo_len, engine, seeds[i], out_dir, log_mode)
+                       for i in batch]
+            results += [future.result() for future in futures]
+            summary = summarize(results)
+            print(f"Replications: {len(results):<4} N = {summary['N'][0]:.3f} +/- {summary['N'][1]:.3f}, "
+                  f"T = {summary['T'][0]:.3f} +/- {summary['T'][1]:.3f} us")
+            if precision and len(results) >= min_replications and converged(summary, precision):
+                break
+    return summary
+
+def write_summary(out_dir, file_ind, summary):
+    sum_file = f"{out_dir}/sum.log"
+    N, N_hw = summary["N"]
+    T, T_hw = summary["T"]
+    labels = [str(i) for i in range(11)] + [">10"]
+    lines = [
+        f"Summary for {file_ind}, {summary['replications']} replications, 95% confidence interval:",
+        f"-------------------------------------------",
+        f"average number of packets in the system N: {N:.3f} +/- {N_hw:.3f}",
+        f"average time spent by a packet in the system T: {T:.3f} +/- {T_hw:.3f} us",
+        f"probability P(n) that an arriving packet finds n packets already in the system:",
+    ]
+    for label, (P, P_hw) in zip(labels, summary["P"]):
+        lines.append(f"{'P(' + label + '):':<10}{P:.5f} +/- {P_hw:.5f}")
+
+    with open(sum_file, 'a') as f:
+        f.write("\n".join(lines) + "\n")
+    print("\n\n\n" + "\n".join(lines))
+
+if __name__ == "__main__":
+    # Create the parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument("--_lambda"     , type=float, default=1.0    , help="lambda"      )
+    parser.add_argument("--npkts"       , type=int  , default=1000000, help="npkts"       )
+    parser.add_argument("--queue"       , type=int  , default=0      , help="Queue length")
+    parser.add_argument("--engine"      , type=str  , default="auto" , choices=["auto"] + e.ENGINES,
+                        help="Simulation engine, auto uses analytic for --queue 0 and event otherwise")
+    parser.add_argument("--seed"        , type=int  , default=None   , help="Base random seed")
+    parser.add_argument("--replications", type=int  , default=30     , help="Maximum number of replications")
+    parser.add_argument("--min_reps"    , type=int  , default=3      , help="Replications before early stopping is checked")
+    parser.add_argument("--precision"   , type=float, default=0      , help="Relative 95%% half-width of N and T to stop at, 0 runs all replications")
+    parser.add_argument("--workers"     , type=int  , default=None   , help="Worker processes, default all cores")
+    parser.add_argument("--output"      , type=str  , default="replications", help="Output directory")
+    parser.add_argument("--log"         , type=str  , default="off"  , choices=eventlog.MODES, help="Per-event log of every replication")
+
+    # Parse the arguments
+    args = parser.parse_args()
+
+    engine = e.resolve(args.engine, args.queue)
+
+    print(f"lambda = {args._lambda}")
+    start_time = time.time()
+    summary = replicate(args._lambda, args.npkts, args.queue, engine, args.seed, args.replications,
+                        args.precision, args.min_reps, args.workers, args.output, args.log)
+    write_summary(args.output, f"lambda = {args._lambda}", summary)
+    elapsed_time = time.time() - start_time
+    print(f"End Running. Time Usage: {elapsed_time} s")
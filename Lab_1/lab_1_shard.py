@@ -0,0 +1,160 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_shard.py
+Description: Sharded run of lab 1 - part b on many cores. The trace is cut at
+             packets that find the system empty, with the last departure at
+             least half a service grid step (0.0005 us) before them, so no
+             tie between a departure and an arrival decides it. From such a
+             packet on, the queue does not depend on anything before it, so
+             every segment is simulated by its own worker process, and the
+             Online_stats, packet files and sim.trace of the segments are
+             merged in trace order. This gives the same sum.log as the
+             single process run.
+             The cut points come from one pass of the Lindley recursion over
+             the trace, about segment_size packets apart, and are cached in
+             <trace>.segments.json. Workers memory-map a binary trace
+             (lab_1_trace.py), so each starts at its segment at once, while a
+             text trace is skipped line by line.
+Dependencies: lab_1_functions, lab_1_engine, lab_1_eventlog, lab_1_sweep, lab_1_packets, numpy,
+              concurrent.futures, json, os, shutil
+"""
+
+import lab_1_functions as f
+import lab_1_engine as e
+import lab_1_eventlog as eventlog
+import lab_1_sweep as sweep
+import lab_1_packets as pktio
+import numpy as np
+import concurrent.futures
+import json
+import os
+import shutil
+
+VERSION = 1
+ENGINES = ["event", "analytic"]
+GAP = 0.0005
+
+def cut_points(source, packet_len = None, segment_size = 1000000, chunk_size = 1000000, service_rate = 1250):
+    """
+    First packet and arrival time of the packet before it, for every segment
+    of source (a fresh Source_part_b). A segment ends at the first idle
+    point at least segment_size packets after its start.
+    """
+    cuts = [(0, 0.0)]
+    next_cut = segment_size
+    last_departure = -np.inf
+    last_arrival = 0.0
+    for packets in source.generate_chunks(packet_len, chunk_size):
+        if len(packets) == 0:
+            continue
+        service = np.round(packets.size / service_rate, 3)
+        departure, wait, num_in_sys = e.lindley(packets.arrival, service, np.array([last_departure]))
+        previous_departure = np.concatenate(([last_departure], departure[:-1]))
+        previous_arrival   = np.concatenate(([last_arrival], packets.arrival[:-1]))
+        idle = np.flatnonzero(packets.arrival - previous_departure > GAP)
+        while True:
+            i = np.searchsorted(packets.index[idle], next_cut)
+            if i == len(idle):
+                break
+            j = idle[i]
+            cuts.append((int(packets.index[j]), float(previous_arrival[j])))
+            next_cut = packets.index[j] + segment_size
+        last_departure = departure[-1]
+        last_arrival = packets.arrival[-1]
+    return cuts, source.generated_packets
+
+def cache_key(file_name, packet_len, segment_size, service_rate):
+    info = os.stat(file_name)
+    return {"version": VERSION, "file_size": info.st_size, "mtime": info.st_mtime,
+            "packet_length": packet_len, "segment": segment_size, "service_rate": service_rate}
+
+def segments(trace_name, binary = False, packet_len = None, segment_size = 1000000, chunk_size = 1000000,
+             service_rate = 1250, refresh = False):
+    """ cut_points() of a trace file as [(first packet, end, arrival time before)], cached next to the trace. """
+    source = f.Source_part_b(trace_name, binary)
+    cache_file = f"{source.file_name}.segments.json"
+    key = cache_key(source.file_name, packet_len, segment_size, service_rate)
+    if not refresh and os.path.exists(cache_file):
+        with open(cache_file, 'r') as file:
+            cached = json.load(file)
+        if cached.get("key") == key:
+            return [tuple(segment) for segment in cached["segments"]]
+
+    cuts, total = cut_points(source, packet_len, segment_size, chunk_size, service_rate)
+    ends = [start for start, _ in cuts[1:]] + [total]
+    result = [(start, end, current_time) for (start, current_time), end in zip(cuts, ends) if end > start]
+    with open(f"{cache_file}.tmp", 'w') as file:
+        json.dump({"key": key, "segments": result}, file)
+    os.replace(f"{cache_file}.tmp", cache_file)
+    return result
+
+def segment_dir(file_addr, k):
+    return f"{file_addr}/segment_{k}"
+
+def run_segment(k, trace_name, binary, start, end, current_time, engine, file_addr, chunk_size = 1000000,
+                log_mode = "off", packet_format = "binary"):
+    """ Simulate packets start .. end - 1 into segment_dir(file_addr, k), returns the Server and Queue statistics. """
+    segment_addr = segment_dir(file_addr, k)
+    os.makedirs(segment_addr, exist_ok=True)
+    log = f.log_init(segment_addr, log_mode)
+    source = f.Source_part_b(trace_name, binary)
+    source.restore({"generated_packets": start, "current_time": current_time})
+    fifo   = f.Queue()
+    server = f.Server(end - start)
+    chunks = source.generate_chunks(end, chunk_size)
+    pkt_file = pktio.open_file(segment_addr, packet_format)
+    match engine:
+        case "analytic":
+            e.run_analytic_chunks(chunks, fifo, server, pkt_file)
+        case "event":
+            e.run_event_chunks(chunks, fifo, server, pkt_file)
+        case _:
+            raise ValueError(f"{engine} engine can not run a segment")
+    if pkt_file != None:
+        pkt_file.close()
+    log.close()
+    return {"stats": server.stats, "served": server.packet_served, "dropped": fifo.dropped_count, "clk": f.sys_clk}
+
+def concatenate(file_addr, count, name, skip = 0):
+    """ Join file name of every segment into file_addr/name, skipping the first skip Bytes after the first segment. """
+    with open(f"{file_addr}/{name}", 'wb') as out:
+        for k in range(count):
+            with open(f"{segment_dir(file_addr, k)}/{name}", 'rb') as file:
+                if k > 0:
+                    file.seek(skip)
+                shutil.copyfileobj(file, out, 16 * 1024 * 1024)
+
+def run(trace_name, binary, packet_len, engine, file_addr, fifo, server, workers = None, segment_size = 1000000,
+        chunk_size = 1000000, log_mode = "off", packet_format = "binary"):
+    """
+    Simulate the trace segment by segment on workers processes and merge the
+    results into fifo and server, ready for server.summary().
+    """
+    if log_mode == "text":
+        raise ValueError("a sharded run can not merge the text sim.log, use the binary or off log")
+    workers = workers or os.cpu_count()
+    parts = segments(trace_name, binary, packet_len, segment_size, chunk_size, server.service_rate)
+    print(f"{len(parts)} segments on {workers} workers")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=sweep.worker_init) as pool:
+        futures = [pool.submit(run_segment, k, trace_name, binary, start, end, current_time, engine, file_addr,
+                               chunk_size, log_mode, packet_format)
+                   for k, (start, end, current_time) in enumerate(parts)]
+        results = [future.result() for future in futures]
+
+    # Segments are merged in trace order, so the result does not depend on which worker finishes first
+    for result in results:
+        server.stats.merge(result["stats"])
+        server.packet_served += result["served"]
+        fifo.dropped_count += result["dropped"]
+    if results:
+        f.System_clk(max(result["clk"] for result in results))
+    server.service_end = 1
+
+    if packet_format != "off" and parts:
+        concatenate(file_addr, len(parts), pktio.FILE_NAMES[packet_format], pktio.header_size(packet_format))
+    if log_mode == "binary" and parts:
+        concatenate(file_addr, len(parts), "sim.trace", eventlog.HEADER_DTYPE.itemsize)
+    for k in range(len(parts)):
+        shutil.rmtree(segment_dir(file_addr, k))
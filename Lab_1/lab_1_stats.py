@@ -0,0 +1,385 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_stats.py
+Description: Output analysis for lab 1: streaming statistics kept by the Server
+             while the simulation runs, confidence intervals of estimates from
+             independent replications, and batch means with MSER warm-up
+             truncation for the steady state of a single long run.
+Dependencies: numpy, math
+"""
+
+import numpy as np
+import math
+
+# Student t quantiles t(0.975, df) for df = 1 .. 30
+T_975 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+          2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+          2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+def t_quantile(df):
+    """ t(0.975, df), table up to 30 and the Cornish-Fisher expansion above. """
+    if df < 1:
+        return math.inf
+    if df <= len(T_975):
+        return T_975[df - 1]
+    z = 1.959964
+    return z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+
+def confidence_interval(values):
+    """ Mean and 95% half-width of independent observations. """
+    values = np.asarray(values, dtype=np.float64)
+    mean = values.mean() if len(values) else math.nan
+    if len(values) < 2:
+        return mean, math.inf
+    half_width = t_quantile(len(values) - 1) * values.std(ddof=1) / math.sqrt(len(values))
+    return mean, half_width
+
+def relative_precision(mean, half_width):
+    if mean == 0:
+        return 0 if half_width == 0 else math.inf
+    return half_width / abs(mean)
+
+class Batch_means:
+    """
+    Online batch means of one output series (e.g. the time in system of each
+    packet). Observations are averaged in batches of batch_size, when
+    2 * max_batches are held, neighbouring batches are merged and the batch
+    size doubles, so memory stays bounded for any run length.
+    """
+    def __init__(self, batch_size = 1000, max_batches = 1000):
+        self.batch_size   = batch_size
+        self.max_batches  = max_batches
+        self.means        = []
+        self.total        = 0
+        self.count        = 0
+        self.observations = 0
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        i = 0
+        while i < len(values):
+            if self.count == 0 and len(values) - i >= self.batch_size:
+                # Whole batches at once
+                nbatch = min((len(values) - i) // self.batch_size, 2 * self.max_batches - len(self.means))
+                block = values[i:i + nbatch * self.batch_size]
+                self.means.extend(block.reshape(nbatch, self.batch_size).mean(axis=1).tolist())
+                self.observations += len(block)
+                i += len(block)
+            else:
+                take = min(self.batch_size - self.count, len(values) - i)
+                self.total += values[i:i + take].sum()
+                self.count += take
+                self.observations += take
+                i += take
+                if self.count == self.batch_size:
+                    self.means.append(self.total / self.batch_size)
+                    self.total = 0
+                    self.count = 0
+            if len(self.means) >= 2 * self.max_batches:
+                means = np.array(self.means)
+                self.means = ((means[0::2] + means[1::2]) / 2).tolist()
+                self.batch_size *= 2
+
+    def truncation(self):
+        """
+        MSER warm-up truncation point in batches: the d <= k/2 minimising
+        sum over j > d of (Y_j - mean(Y_d+1..k))^2 / (k - d)^2.
+        """
+        means = np.array(self.means)
+        k = len(means)
+        if k < 4:
+            return 0
+        remaining = np.arange(k, 0, -1)
+        total  = np.cumsum(means[::-1])[::-1]
+        square = np.cumsum(means[::-1] ** 2)[::-1]
+        mser = (square - total ** 2 / remaining) / remaining ** 2
+        return int(np.argmin(mser[:k // 2 + 1]))
+
+    def estimate(self):
+        """ Mean, standard error, 95% half-width and warm-up observations dropped. """
+        d = self.truncation()
+        means = np.array(self.means[d:])
+        if len(means) == 0:
+            return math.nan, math.inf, math.inf, 0
+        mean = means.mean()
+        if len(means) < 2:
+            return mean, math.inf, math.inf, d * self.batch_size
+        std_err = means.std(ddof=1) / math.sqrt(len(means))
+        return mean, std_err, t_quantile(len(means) - 1) * std_err, d * self.batch_size
+
+class Steady_state:
+    """
+    Steady-state N and T from one long run by batch means with MSER warm-up
+    truncation. Engines feed the number in system seen by every accepted
+    arrival and the time in system of every departure. With precision > 0,
+    done() turns true once both 95% half-widths are within precision of the 
+    mean, over at least min_batches batches after the warm-up.
+    """
+    def __init__(self, batch_size = 1000, precision = 0, min_batches = 20):
+        self.N = Batch_means(batch_size)
+        self.T = Batch_means(batch_size)
+        self.precision   = precision
+        self.min_batches = min_batches
+        self.converged   = False
+        self.buffer_N    = []
+        self.buffer_T    = []
+
+    def arrival(self, num_in_sys):
+        self.buffer_N.append(num_in_sys)
+        if len(self.buffer_N) >= self.N.batch_size:
+            self.arrivals(self.buffer_N)
+            self.buffer_N = []
+
+    def departure(self, spent):
+        self.buffer_T.append(spent)
+        if len(self.buffer_T) >= self.T.batch_size:
+            self.departures(self.buffer_T)
+            self.buffer_T = []
+
+    def arrivals(self, num_in_sys):
+        batches = len(self.N.means)
+        self.N.add(num_in_sys)
+        if len(self.N.means) != batches:
+            self.check()
+
+    def departures(self, spent):
+        batches = len(self.T.means)
+        self.T.add(spent)
+        if len(self.T.means) != batches:
+            self.check()
+
+    def check(self):
+        if not self.precision:
+            return
+        for series in (self.N, self.T):
+            mean, std_err, half_width, warm_up = series.estimate()
+            if series.observations - warm_up < self.min_batches * series.batch_size:
+                self.converged = False
+                return
+            if relative_precision(mean, half_width) > self.precision:
+                self.converged = False
+                return
+        self.converged = True
+
+    def done(self):
+        return self.converged
+
+    def flush(self):
+        if self.buffer_N:
+            self.N.add(self.buffer_N)
+            self.buffer_N = []
+        if self.buffer_T:
+            self.T.add(self.buffer_T)
+            self.buffer_T = []
+
+    def summary(self, file_addr, file_ind):
+        self.flush()
+        N, N_err, N_hw, N_warm = self.N.estimate()
+        T, T_err, T_hw, T_warm = self.T.estimate()
+        lines = [
+            f"Steady-state estimate for {file_ind} (batch means, MSER warm-up truncation):",
+            f"-------------------------------------------",
+            f"batches: N {len(self.N.means)} of {self.N.batch_size}, T {len(self.T.means)} of {self.T.batch_size} packets",
+            f"warm-up discarded: N {N_warm} packets, T {T_warm} packets",
+            f"average number of packets in the system N: {N:.3f} +/- {N_hw:.3f} (std err {N_err:.4f})",
+            f"average time spent by a packet in the system T: {T:.3f} +/- {T_hw:.3f} us (std err {T_err:.4f})",
+        ]
+        with open(f"{file_addr}/sum.log", 'a') as f:
+            f.write("\n".join(lines) + "\n")
+        print("\n" + "\n".join(lines))
+        return {"N": N, "N_std_err": N_err, "N_half_width": N_hw, "N_warm_up": N_warm,
+                "T": T, "T_std_err": T_err, "T_half_width": T_hw, "T_warm_up": T_warm}
+
+PERCENTILES      = [0.5, 0.9, 0.99, 0.999]
+PERCENTILE_NAMES = ["p50", "p90", "p99", "p99.9"]
+# 0, then 1-2-5 steps per decade from 0.01 us to 100 ms
+DELAY_EDGES = [0] + [round(m * 10.0 ** e, 2) for e in range(-2, 5) for m in (1, 2, 5)] + [100000]
+
+class Log_histogram:
+    """
+    Mergeable quantile sketch with logarithmic buckets, every quantile is 
+    within relative_error of the true value. Values below min_value (e.g. 
+    a zero waiting time) are counted in a separate zero bucket.
+    """
+    def __init__(self, relative_error = 0.01, min_value = 1e-3, max_value = 1e9):
+        self.relative_error = relative_error
+        self.min_value  = min_value
+        self.gamma      = (1 + relative_error) / (1 - relative_error)
+        self.log_gamma  = math.log(self.gamma)
+        self.offset     = math.ceil(math.log(min_value) / self.log_gamma)
+        self.counts     = np.zeros(math.ceil(math.log(max_value) / self.log_gamma) - self.offset + 1, dtype=np.int64)
+        self.zero_count = 0
+        self.count      = 0
+
+    def add(self, value):
+        self.count += 1
+        if value < self.min_value:
+            self.zero_count += 1
+            return
+        i = min(math.ceil(math.log(value) / self.log_gamma) - self.offset, len(self.counts) - 1)
+        self.counts[i] += 1
+
+    def add_array(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.count += len(values)
+        small = values < self.min_value
+        self.zero_count += int(small.sum())
+        i = np.ceil(np.log(values[~small]) / self.log_gamma).astype(np.int64) - self.offset
+        i = np.minimum(i, len(self.counts) - 1)
+        self.counts += np.bincount(i, minlength=len(self.counts))
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def histogram(self, edges):
+        """ Counts between consecutive edges, edges[0] should be 0. """
+        values = np.concatenate(([0], self.value(np.arange(len(self.counts)))))
+        counts = np.concatenate(([self.zero_count], self.counts))
+        i = np.searchsorted(edges, values, side="right") - 1
+        return np.bincount(i, weights=counts, minlength=len(edges))[:len(edges)].astype(np.int64)
+
+    def value(self, i):
+        """ Representative value of bucket i. """
+        return 2 * self.gamma ** (i + self.offset) / (self.gamma + 1)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0
+        i = int(np.searchsorted(np.cumsum(self.counts), rank - self.zero_count, side="right"))
+        return self.value(min(i, len(self.counts) - 1))
+
+class Online_stats:
+    """
+    Streaming statistics of one queue, updated as packets arrive and depart,
+    so the summary never needs the packets and shards can be merged:
+    - time in system: count, mean and variance (Welford / Chan), min, max 
+      and a Log_histogram for percentiles
+    - waiting time in the queue: mean and a Log_histogram
+    - number in system seen by each arrival: histogram of 0 .. max_n with 
+      one overflow bucket, the overflow sum keeps the mean exact
+    - time-average number in system: by Little's law the area under N(t) 
+      is the sum of the times in system, divided by the run time
+    """
+    def __init__(self, max_n = 1000):
+        self.served   = 0
+        self.mean     = 0
+        self.M2       = 0
+        self.min      = math.inf
+        self.max      = -math.inf
+        self.spent    = Log_histogram()
+        self.wait     = Log_histogram()
+        self.wait_total = 0
+        self.num_sys  = np.zeros(max_n + 2, dtype=np.int64)
+        self.overflow_total = 0
+        self.end_time = 0
+
+    def arrival(self, num_in_sys):
+        if num_in_sys < len(self.num_sys) - 1:
+            self.num_sys[num_in_sys] += 1
+        else:
+            self.num_sys[-1] += 1
+            self.overflow_total += num_in_sys
+
+    def arrivals(self, num_in_sys):
+        num_in_sys = np.asarray(num_in_sys)
+        overflow = num_in_sys >= len(self.num_sys) - 1
+        self.num_sys[-1] += int(overflow.sum())
+        self.overflow_total += int(num_in_sys[overflow].sum())
+        self.num_sys[:-1] += np.bincount(num_in_sys[~overflow], minlength=len(self.num_sys) - 1)
+
+    def departure(self, spent, time, wait = 0):
+        self.served += 1
+        delta = spent - self.mean
+        self.mean += delta / self.served
+        self.M2 += delta * (spent - self.mean)
+        self.min = min(self.min, spent)
+        self.max = max(self.max, spent)
+        self.spent.add(spent)
+        self.wait.add(wait)
+        self.wait_total += wait
+        self.end_time = max(self.end_time, time)
+
+    def departures(self, spent, time, wait = None):
+        spent = np.asarray(spent, dtype=np.float64)
+        if wait is None:
+            wait = np.zeros(len(spent))
+        wait = np.asarray(wait, dtype=np.float64)
+        if len(spent) == 0:
+            return
+        other = Online_stats(len(self.num_sys) - 2)
+        other.served = len(spent)
+        other.mean   = spent.mean()
+        other.M2     = ((spent - other.mean) ** 2).sum()
+        other.min    = spent.min()
+        other.max    = spent.max()
+        other.spent.add_array(spent)
+        other.wait.add_array(wait)
+        other.wait_total = float(np.sum(wait))
+        other.end_time = time
+        self.merge_spent(other)
+
+    def merge_spent(self, other):
+        served = self.served + other.served
+        if served == 0:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.served / served
+        self.M2   += other.M2 + delta ** 2 * self.served * other.served / served
+        self.served = served
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.spent.merge(other.spent)
+        self.wait.merge(other.wait)
+        self.wait_total += other.wait_total
+        self.end_time = max(self.end_time, other.end_time)
+
+    def merge(self, other):
+        """ Add the statistics of another run or shard of the same system. """
+        self.merge_spent(other)
+        self.num_sys += other.num_sys
+        self.overflow_total += other.overflow_total
+
+    def arrived(self):
+        return int(self.num_sys.sum())
+
+    def N(self):
+        """ Average number in system found by an arriving packet. """
+        if self.arrived() == 0:
+            return math.nan
+        found = np.dot(np.arange(len(self.num_sys) - 1), self.num_sys[:-1]) + self.overflow_total
+        return found / self.arrived()
+
+    def N_time(self):
+        if self.end_time == 0:
+            return math.nan
+        return self.mean * self.served / self.end_time
+
+    def T(self):
+        return self.mean if self.served else math.nan
+
+    def T_std(self):
+        return math.sqrt(self.M2 / (self.served - 1)) if self.served > 1 else math.nan
+
+    def W(self):
+        return self.wait_total / self.served if self.served else math.nan
+
+    def percentile(self, q):
+        return self.spent.quantile(q)
+
+    def percentiles(self):
+        """ p50, p90, p99 and p99.9 of the time in system and of the waiting time. """
+        return {"T": {name: self.spent.quantile(q) for name, q in zip(PERCENTILE_NAMES, PERCENTILES)},
+                "W": {name: self.wait.quantile(q) for name, q in zip(PERCENTILE_NAMES, PERCENTILES)}}
+
+    def delay_histogram(self):
+        """ Log-bucketed histogram of the time in system and the waiting time, in us. """
+        return {"edges": DELAY_EDGES,
+                "T": self.spent.histogram(DELAY_EDGES).tolist(),
+                "W": self.wait.histogram(DELAY_EDGES).tolist()}
@@ -0,0 +1,151 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_sweep.py
+Description: Parameter sweep of lab 1 - part a over lambda, queue length, npkts
+             and seed. Points run in parallel on a process pool, every result is
+             appended to <output>/sweep.csv as soon as it is done, so a sweep
+             that is stopped can be run again and only the missing points run.
+             Every point is checked against M/M/1 or M/M/1/K (lab_1_validate):
+             N_error and T_error are relative errors, P_error is the largest
+             absolute error of P(0) .. P(10) and P_block.
+Dependencies: lab_1_part_a, lab_1_engine, lab_1_eventlog, lab_1_output, concurrent.futures, argparse, csv,
+              itertools, os, sys, time
+"""
+
+import lab_1_part_a as a
+import lab_1_engine as e
+import lab_1_eventlog as eventlog
+import lab_1_output as output
+import concurrent.futures
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+
+KEY_FIELDS = ["lambda", "queue", "npkts", "seed", "engine"]
+FIELDS = KEY_FIELDS + ["N", "T", "served", "dropped"] + [f"P{i}" for i in range(11)] + ["P>10"] \
+         + ["P_block", "N_theory", "T_theory", "P_block_theory", "N_error", "T_error", "P_error", "elapsed"]
+
+def make_grid(lambdas, queues, npkts_list, seeds, engine="auto"):
+    points = []
+    for _lambda, fifo_len, npkts, seed in itertools.product(lambdas, queues, npkts_list, seeds):
+        points.append({"lambda": _lambda, "queue": fifo_len, "npkts": npkts, "seed": seed,
+                       "engine": e.resolve(engine, fifo_len)})
+    return points
+
+def point_key(point):
+    return tuple(str(point[field]) for field in KEY_FIELDS)
+
+def point_name(point):
+    return f"lambda_{point['lambda']}_npkts_{point['npkts']}_Qlen_{point['queue']}_seed_{point['seed']}_{point['engine']}"
+
+def worker_init():
+    # Keep the console for the sweep progress
+    sys.stdout = open(os.devnull, 'w')
+    e.show_progress = False
+
+def run_point(point, out_dir, save_packets=False, log_mode="off"):
+    """ One point in its own lab_1_output run directory under out_dir. """
+    run = output.Run(point_name(point), dict(point, packet_format="binary" if save_packets else "off", log=log_mode), out_dir)
+    start_time = time.time()
+    with run.start():
+        result = a.simulate(point["lambda"], point["npkts"], point["queue"], point["engine"],
+                            point["seed"], run.file_addr, save_packets, log_mode=log_mode)
+    row = dict(point)
+    row["N"] = result["N"]
+    row["T"] = result["T"]
+    row["served"] = result["served"]
+    row["dropped"] = result["dropped"]
+    for i in range(11):
+        row[f"P{i}"] = result["P"][i]
+    row["P>10"] = sum(result["P"][11:])
+    validation = result["validation"]
+    row["P_block"] = validation["metrics"]["P_block"]["simulated"]
+    row["N_theory"] = validation["metrics"]["N (arrivals)"]["analytic"]
+    row["T_theory"] = validation["metrics"]["T (us)"]["analytic"]
+    row["P_block_theory"] = validation["metrics"]["P_block"]["analytic"]
+    row["N_error"] = validation["N_error"]
+    row["T_error"] = validation["T_error"]
+    row["P_error"] = validation["P_error"]
+    row["elapsed"] = time.time() - start_time
+    return row
+
+def load_done(result_file):
+    if not os.path.exists(result_file):
+        return set()
+    with open(result_file, 'r', newline='') as file:
+        reader = csv.DictReader(file)
+        if reader.fieldnames != None and reader.fieldnames != FIELDS:
+            raise ValueError(f"{result_file} has different columns, use a new --output directory")
+        return {point_key(row) for row in reader}
+
+def sweep(points, out_dir, workers=None, retries=1, save_packets=False, log_mode="off"):
+    """
+    Run every point not yet in <out_dir>/sweep.csv. A point whose worker
+    raises or dies is retried up to retries times with a fresh pool, then
+    left out of the table so the next run of the sweep picks it up again.
+    Returns the points that still failed.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    result_file = os.path.join(out_dir, "sweep.csv")
+    done = load_done(result_file)
+    todo = [point for point in points if point_key(point) not in done]
+    print(f"Sweep: {len(points)} points, {len(points) - len(todo)} already done, {workers or os.cpu_count()} workers")
+
+    with open(result_file, 'a', newline='') as file:
+        writer = csv.DictWriter(file, FIELDS)
+        if file.tell() == 0:
+            writer.writeheader()
+        for attempt in range(retries + 1):
+            if not todo:
+                break
+            failed = []
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=worker_init) as pool:
+                futures = {pool.submit(run_point, point, out_dir, save_packets, log_mode): point for point in todo}
+                for future in concurrent.futures.as_completed(futures):
+                    point = futures[future]
+                    try:
+                        row = future.result()
+                    except Exception as error:
+                        print(f"Failed {point_name(point)}: {error!r}")
+                        failed.append(point)
+                        continue
+                    writer.writerow(row)
+                    file.flush()
+                    print(f"Done   {point_name(point)}: N = {row['N']:.2f}, T = {row['T']:.3f} us "
+                          f"({row['T_error']:+.2%} vs theory), P_block = {row['P_block']:.5f}, {row['elapsed']:.1f} s")
+            todo = failed
+
+    if todo:
+        print(f"{len(todo)} points failed, run the sweep again to retry them")
+    return todo
+
+if __name__ == "__main__":
+    # Create the parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument("--lambdas", type=float, nargs="+", default=[1.0]    , help="lambda values")
+    parser.add_argument("--queues" , type=int  , nargs="+", default=[0]      , help="Queue lengths, 0 is infinite")
+    parser.add_argument("--npkts"  , type=int  , nargs="+", default=[1000000], help="npkts values")
+    parser.add_argument("--seeds"  , type=int  , nargs="+", default=[1]      , help="Random seeds")
+    parser.add_argument("--engine" , type=str  , default="auto", choices=["auto"] + e.ENGINES,
+                        help="Simulation engine, auto uses analytic for --queue 0 and event otherwise")
+    parser.add_argument("--workers", type=int  , default=None   , help="Worker processes, default all cores")
+    parser.add_argument("--retries", type=int  , default=1      , help="Retries of failed points")
+    parser.add_argument("--output" , type=str  , default="sweep", help="Output directory")
+    parser.add_argument("--packets", action="store_true", help="Also write packets.bin of every point")
+    parser.add_argument("--log"    , type=str  , default="off"  , choices=eventlog.MODES, help="Per-event log of every point")
+
+    # Parse the arguments
+    args = parser.parse_args()
+
+    start_time = time.time()
+    points = make_grid(args.lambdas, args.queues, args.npkts, args.seeds, args.engine)
+    sweep(points, args.output, args.workers, args.retries, args.packets, args.log)
+    elapsed_time = time.time() - start_time
+    print(f"End Running. Time Usage: {elapsed_time} s")
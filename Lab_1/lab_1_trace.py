@@ -0,0 +1,114 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_trace.py
+Description: Readers for the part b traces and a converter from the text trace
+             lab_1_part_b_<trace>.txt to the binary trace lab_1_part_b_<trace>.bin.
+             Binary layout: one 24 Bytes header (magic, version, record size,
+             packet count) followed by packed records of inter-arrival time
+             (float64) and packet size (uint32), all little endian.
+Dependencies: numpy, itertools, argparse, os, time
+"""
+
+import numpy as np
+import itertools
+import argparse
+import os
+import time
+
+MAGIC   = b"L1_TRACE"
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("record_size", "<u4"), ("count", "<u8")])
+RECORD_DTYPE = np.dtype([("inter_arrival", "<f8"), ("size", "<u4")])
+
+def text_name(trace):
+    return f"lab_1_part_b_{trace}.txt"
+
+def binary_name(trace):
+    return f"lab_1_part_b_{trace}.bin"
+
+def read_text(file_name, packet_len = None, chunk_size = 1000000, skip = 0):
+    """
+    Yield (inter_arrival, size) arrays of up to chunk_size lines from a text trace.
+    The first skip lines are passed over without parsing them.
+    """
+    read = skip
+    with open(file_name, 'rb') as file:
+        for line in itertools.islice(file, skip):
+            pass
+        while not packet_len or read < packet_len:
+            npkts = chunk_size
+            if packet_len:
+                npkts = min(chunk_size, packet_len - read)
+            lines = list(itertools.islice(file, npkts))
+            if not lines:
+                break
+            trace = np.loadtxt(lines, ndmin=2)
+            read += len(trace)
+            yield trace[:, 0], trace[:, 1]
+
+def open_binary(file_name):
+    """ Memory-map a binary trace, the records are read straight from the page cache. """
+    header = np.fromfile(file_name, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header[0]["magic"] != MAGIC:
+        raise ValueError(f"{file_name} is not a lab 1 binary trace")
+    if header[0]["version"] != VERSION or header[0]["record_size"] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{file_name}: unsupported binary trace version {header[0]['version']}")
+    count = int(header[0]["count"])
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(file_name, dtype=RECORD_DTYPE, mode='r', offset=HEADER_DTYPE.itemsize, shape=(count,))
+
+def read_binary(file_name, packet_len = None, chunk_size = 1000000, skip = 0):
+    """ Yield (inter_arrival, size) views of up to chunk_size records after the first skip, no copy is made. """
+    records = open_binary(file_name)
+    if packet_len:
+        records = records[:packet_len]
+    records = records[skip:]
+    for i in range(0, len(records), chunk_size):
+        chunk = records[i:i + chunk_size]
+        yield chunk["inter_arrival"], chunk["size"]
+
+def write_binary(binary_file, blocks):
+    """ Write (inter_arrival, size) blocks as a binary trace, returns the number of packets. """
+    count = 0
+    temp_file = f"{binary_file}.tmp"
+    with open(temp_file, 'wb') as file:
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header["magic"] = MAGIC
+        header["version"] = VERSION
+        header["record_size"] = RECORD_DTYPE.itemsize
+        header.tofile(file)
+        for inter_arrival, size in blocks:
+            records = np.empty(len(inter_arrival), dtype=RECORD_DTYPE)
+            records["inter_arrival"] = inter_arrival
+            records["size"] = size
+            records.tofile(file)
+            count += len(records)
+        # Packet count is only known at the end
+        header["count"] = count
+        file.seek(0)
+        header.tofile(file)
+    os.replace(temp_file, binary_file)
+    return count
+
+def convert(text_file, binary_file, chunk_size = 1000000):
+    """ Convert a text trace to the binary format, returns the number of packets. """
+    return write_binary(binary_file, read_text(text_file, chunk_size=chunk_size))
+
+if __name__ == "__main__":
+    # Create the parser
+    parser = argparse.ArgumentParser(description="Convert a part b text trace to the binary trace format")
+
+    # Add arguments
+    parser.add_argument("--traceNumber", type=str, default='trace1', help="traceNumber")
+    parser.add_argument("--chunk",      type=int, default=1000000, help="Lines converted per block")
+
+    # Parse the arguments
+    args = parser.parse_args()
+
+    start_time = time.time()
+    count = convert(text_name(args.traceNumber), binary_name(args.traceNumber), args.chunk)
+    elapsed_time = time.time() - start_time
+    print(f"{text_name(args.traceNumber)} -> {binary_name(args.traceNumber)}: {count} packets. Time Usage: {elapsed_time} s")
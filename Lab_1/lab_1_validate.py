@@ -0,0 +1,96 @@
+"""
+Code Author: Peng, Caikun
+Create Date: 18/10/2026
+Last Edit Date: 18/10/2026
+File Name: lab_1_validate.py
+Description: Closed-form M/M/1 and M/M/1/K results for the lambda and service
+             rate of a run of part a, and the simulated - analytic error of
+             N, T, W, P(n) and the blocking probability P_block.
+             Queue(size) holds size waiting packets besides the one in service,
+             so --queue K' is an M/M/1/K system with K = K' + 1, and --queue 0
+             is M/M/1.
+Dependencies: numpy, math
+"""
+
+import numpy as np
+import math
+
+MAX_N = 10
+
+def mm1(_lambda, mu, max_n = MAX_N):
+    """ M/M/1, every value is nan when rho >= 1. """
+    rho = _lambda / mu
+    if rho >= 1:
+        return {"model": "M/M/1", "rho": rho, "L": math.nan, "N": math.nan, "T": math.nan, "W": math.nan,
+                "P": [math.nan] * (max_n + 1), "P_block": 0.0}
+    L = rho / (1 - rho)
+    return {"model": "M/M/1", "rho": rho, "L": L, "N": L, "T": 1 / (mu - _lambda), "W": rho / (mu - _lambda),
+            "P": [(1 - rho) * rho ** n for n in range(max_n + 1)], "P_block": 0.0}
+
+def mm1k(_lambda, mu, K, max_n = MAX_N):
+    """
+    M/M/1/K with K places in the system. N, T, W and P(n) are those seen by
+    the accepted packets (what Server.summary measures), L is the time-average
+    number in the system.
+    """
+    rho = _lambda / mu
+    n = np.arange(K + 1)
+    # rho ** n scaled by its largest term, so a large K with rho > 1 does not overflow
+    p = np.exp(n * math.log(rho) - max(0, K * math.log(rho)))
+    p /= p.sum()
+    P_block = p[K]
+    accepted = p[:K] / (1 - P_block)
+    L = float((n * p).sum())
+    T = L / (_lambda * (1 - P_block))
+    P = [float(accepted[i]) if i < K else 0.0 for i in range(max_n + 1)]
+    return {"model": f"M/M/1/{K}", "rho": rho, "L": L, "N": float((n[:K] * accepted).sum()), "T": T,
+            "W": T - 1 / mu, "P": P, "P_block": float(P_block)}
+
+def analytic(_lambda, mu, fifo_len, max_n = MAX_N):
+    if fifo_len == 0:
+        return mm1(_lambda, mu, max_n)
+    return mm1k(_lambda, mu, fifo_len + 1, max_n)
+
+def compare(result, _lambda, mu, fifo_len, max_n = MAX_N):
+    """
+    result is the dict of Server.summary. Returns the analytic model and
+    (metric, simulated, analytic) rows.
+    """
+    theory = analytic(_lambda, mu, fifo_len, max_n)
+    arrivals = result["served"] + result["dropped"]
+    rows = [("N (arrivals)",     result["N"],      theory["N"]),
+            ("N (time-average)", result["N_time"], theory["L"]),
+            ("T (us)",           result["T"],      theory["T"]),
+            ("W (us)",           result["W"],      theory["W"])]
+    rows += [(f"P({n})", result["P"][n] if n < len(result["P"]) else 0.0, theory["P"][n]) for n in range(max_n + 1)]
+    rows.append(("P_block", result["dropped"] / arrivals if arrivals else math.nan, theory["P_block"]))
+    return theory, rows
+
+def error(simulated, expected):
+    return simulated - expected
+
+def relative_error(simulated, expected):
+    return (simulated - expected) / expected if expected else math.nan
+
+def validate(result, _lambda, mu, fifo_len, file_addr, file_ind):
+    """ Append the simulated vs analytic table to sum.log and return it. """
+    theory, rows = compare(result, _lambda, mu, fifo_len)
+    lines = [
+        f"Validation for {file_ind} against {theory['model']} (rho = {theory['rho']:.3f}):",
+        f"-------------------------------------------",
+        f"{'metric':<18}{'simulated':<14}{'analytic':<14}{'error':<14}{'rel. error':<14}",
+    ]
+    for name, simulated, expected in rows:
+        rel = relative_error(simulated, expected)
+        rel = f"{rel:.2%}" if math.isfinite(rel) else "-"
+        lines.append(f"{name:<18}{simulated:<14.5f}{expected:<14.5f}{error(simulated, expected):<14.5f}{rel:<14}")
+    with open(f"{file_addr}/sum.log", 'a') as f:
+        f.write("\n".join(lines) + "\n")
+    print("\n" + "\n".join(lines))
+
+    metrics = {name: {"simulated": simulated, "analytic": expected} for name, simulated, expected in rows}
+    P_errors = [abs(error(simulated, expected)) for name, simulated, expected in rows if name.startswith("P")]
+    return {"model": theory["model"], "rho": theory["rho"], "metrics": metrics,
+            "N_error": relative_error(result["N"], theory["N"]),
+            "T_error": relative_error(result["T"], theory["T"]),
+            "P_error": float(np.max(P_errors))}